@@ -23,6 +23,9 @@ class LazyIterator:
 
 class DataStreamProcessor:
 
+    # Number of rows in each record batch of the tables returned by `arrow_results`
+    ARROW_BATCH_SIZE = 64 * 1024
+
     def __init__(self):
         self.stats = {}
         self.source = None
@@ -96,18 +99,21 @@ class DataStreamProcessor:
             raise error from cause
         raise cause
 
-    def safe_process(self, return_results=False, on_error=None):
+    def safe_process(self, return_results=False, on_error=None, collect=None):
+        # `collect` builds the results of a resource from its descriptor and rows
+        if collect is None:
+            collect = lambda descriptor, rows: list(rows)  # noqa
         results = []
         try:
             ds = self._process()
             for res in ds.res_iter:
                 if return_results:
                     if on_error is not None:
-                        results.append(list(
-                            schema_validator(res.res, res, on_error=on_error)
+                        results.append(collect(
+                            res.res.descriptor, schema_validator(res.res, res, on_error=on_error)
                         ))
                     else:
-                        results.append(list(res))
+                        results.append(collect(res.res.descriptor, res))
                 else:
                     collections.deque(res, maxlen=0)
         except UniqueKeyError as e:
@@ -126,3 +132,12 @@ class DataStreamProcessor:
     def results(self, on_error=None):
         ds, results = self.safe_process(return_results=True, on_error=on_error)
         return results, ds.dp, ds.merge_stats()
+
+    def arrow_results(self, on_error=None, batch_size=None, float_numbers=False):
+        from ..helpers.arrow import to_table
+
+        def collect(descriptor, rows):
+            return to_table(descriptor.get('schema', {}), rows, batch_size or self.ARROW_BATCH_SIZE, float_numbers)
+
+        ds, results = self.safe_process(return_results=True, on_error=on_error, collect=collect)
+        return results, ds.dp, ds.merge_stats()
@@ -5,6 +5,22 @@ from .datastream_processor import DataStreamProcessor
 from .schema_validator import raise_exception
 
 
+def push_down(links):
+    # Steps which only select fields or filter rows describe themselves in a `pushdown` attribute,
+    # which is handed to a loader preceding them so it doesn't produce what these steps discard.
+    # The steps themselves still run as usual.
+    links = list(links)
+    target, steps = None, []
+    for link in links + [None]:
+        if target is not None and hasattr(link, 'pushdown'):
+            steps.append(link.pushdown)
+            continue
+        if target is not None:
+            target.handle_flow_pushdown(steps)
+        target, steps = (link, []) if hasattr(link, 'handle_flow_pushdown') else (None, [])
+    return links
+
+
 class Flow:
     def __init__(self, *args):
         self.chain = args
@@ -12,6 +28,9 @@ class Flow:
     def results(self, on_error=raise_exception):
         return self._chain().results(on_error=on_error)
 
+    def arrow_results(self, on_error=raise_exception, batch_size=None, float_numbers=False):
+        return self._chain().arrow_results(on_error=on_error, batch_size=batch_size, float_numbers=float_numbers)
+
     def process(self):
         return self._chain().process()
 
@@ -29,8 +48,9 @@ class Flow:
 
     def _chain(self, ds=None):
         from ..helpers import datapackage_processor, rows_processor, row_processor, iterable_loader
+        from ..helpers.arrow import is_arrow
 
-        for position, link in enumerate(self._preprocess_chain(), start=1):
+        for position, link in enumerate(push_down(self._preprocess_chain()), start=1):
             if isinstance(link, Flow):
                 ds = link._chain(ds)
             elif isinstance(link, DataStreamProcessor):
@@ -49,7 +69,7 @@ class Flow:
                         assert False, 'Failed to parse function signature {!r}'.format(params)
                 else:
                     assert False, 'Failed to parse function signature {!r}'.format(params)
-            elif isinstance(link, Iterable):
+            elif isinstance(link, Iterable) or is_arrow(link):
                 ds = iterable_loader(link)(ds, position=position)
 
         return ds
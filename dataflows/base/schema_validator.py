@@ -1,3 +1,5 @@
+import datetime
+import decimal
 from inspect import signature
 
 from datapackage import Resource
@@ -50,6 +52,27 @@ def wrap_handler(on_error):
     return func
 
 
+# Values of these types are returned as is when cast to these field types
+TYPES = {
+    'string': str,
+    'integer': int,
+    'number': decimal.Decimal,
+    'boolean': bool,
+    'object': dict,
+    'array': list,
+    'date': datetime.date,
+    'datetime': datetime.datetime,
+    'time': datetime.time,
+}
+
+
+def cast_type(field):
+    # The type of values which don't need casting, if checking them can be skipped as well
+    if field.constraints or (field.type == 'string' and field.format != 'default'):
+        return None
+    return TYPES.get(field.type)
+
+
 def schema_validator(resource, iterator,
                      field_names=None, on_error=None):
     if on_error is None:
@@ -64,13 +87,17 @@ def schema_validator(resource, iterator,
         schema: Schema = Schema(resource.get('schema', {}))
     if field_names is None:
         field_names = [f.name for f in schema.fields]
-    schema_fields = [f for f in schema.fields if f.name in field_names]
+    schema_fields = [(f, cast_type(f), f.missing_values) for f in schema.fields if f.name in field_names]
     for i, row in enumerate(iterator):
         field = None
         okay = True
-        for field in schema_fields:
+        for field, field_type, missing_values in schema_fields:
+            value = row.get(field.name)
+            # Values which are already typed (e.g. decoded from extended JSON) are kept
+            if field_type is not None and type(value) is field_type and value not in missing_values:
+                continue
             try:
-                row[field.name] = field.cast_value(row.get(field.name))
+                row[field.name] = field.cast_value(value)
             except CastError as e:
                 if not on_error(resource['name'], row, i, e, field):
                     okay = False
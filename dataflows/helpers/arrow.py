@@ -0,0 +1,232 @@
+import json
+import decimal
+import itertools
+
+import isodate
+
+# Values of types without an equivalent Arrow type are converted to strings, the same way the CSV format writes them
+SERIALIZERS = {
+    'array': lambda v: json.dumps(v, ensure_ascii=False),
+    'object': lambda v: json.dumps(v, ensure_ascii=False),
+    'duration': lambda d: isodate.duration_isoformat(d),
+    'geopoint': lambda d: '{}, {}'.format(*d),
+    'geojson': json.dumps,
+    'yearmonth': lambda d: '{:04d}-{:02d}'.format(*d),
+    'any': str,
+}
+MAX_DECIMAL_PRECISION = 38
+
+
+def is_arrow(obj):
+    # pyarrow is only imported for objects which come from it
+    if not type(obj).__module__.startswith('pyarrow'):
+        return False
+    import pyarrow as pa
+    return isinstance(obj, (pa.Table, pa.RecordBatch, pa.RecordBatchReader))
+
+
+# Metadata of string columns holding numbers which don't fit in a decimal type, for reading them back as decimals
+TYPE_METADATA_KEY = b'tableschema:type'
+NUMBER_TYPE = b'number'
+
+
+def arrow_types():
+    import pyarrow as pa
+    return {
+        'string': pa.string(),
+        'integer': pa.int64(),
+        'boolean': pa.bool_(),
+        'date': pa.date32(),
+        'time': pa.time64('us'),
+        'datetime': pa.timestamp('us'),
+        'year': pa.int32(),
+    }
+
+
+def to_decimal(value):
+    if type(value) is float:
+        return decimal.Decimal(repr(value))
+    if isinstance(value, decimal.Decimal):
+        return value
+    return decimal.Decimal(value)
+
+
+def decimal_type(values, headroom=False):
+    """Arrow decimal type which holds all of the given numbers exactly, or None if there's no such type
+
+    With `headroom`, the precision is the maximal one, so that later values with more integer digits fit too.
+    """
+    import pyarrow as pa
+    scale = 0
+    integer_digits = 0
+    for value in values:
+        if value is None:
+            continue
+        value = to_decimal(value)
+        if not value.is_finite():
+            return None
+        _, digits, exponent = value.as_tuple()
+        scale = max(scale, -exponent)
+        integer_digits = max(integer_digits, len(digits) + exponent)
+    precision = max(1, integer_digits + scale)
+    if precision > MAX_DECIMAL_PRECISION:
+        return None
+    return pa.decimal128(MAX_DECIMAL_PRECISION if headroom else precision, scale)
+
+
+def number_field(name, values, float_numbers=False, headroom=False):
+    """Arrow field for a `number` field with the given values
+
+    Numbers are decimals, so they're stored as Arrow decimals of the precision and scale of the values.
+    Values which don't fit in a decimal type (e.g. more than 38 digits, or NaN) are stored as strings, with metadata
+    for reading them back as numbers. With `float_numbers`, they're stored as doubles instead, which may lose precision.
+    """
+    import pyarrow as pa
+    if float_numbers:
+        return pa.field(name, pa.float64())
+    arrow_type = decimal_type(values, headroom)
+    if arrow_type is None:
+        return pa.field(name, pa.string(), metadata={TYPE_METADATA_KEY: NUMBER_TYPE})
+    return pa.field(name, arrow_type)
+
+
+def number_array(values, arrow_type):
+    import pyarrow as pa
+    if pa.types.is_floating(arrow_type):
+        values = [float(value) if value is not None else None for value in values]
+    elif pa.types.is_decimal(arrow_type):
+        values = [to_decimal(value) if value is not None else None for value in values]
+    else:
+        values = [str(value) if value is not None else None for value in values]
+    return pa.array(values, type=arrow_type)
+
+
+def is_number_field(field):
+    import pyarrow as pa
+    return pa.types.is_string(field.type) and (field.metadata or {}).get(TYPE_METADATA_KEY) == NUMBER_TYPE
+
+
+def decode_numbers(schema, rows):
+    """Converts values of string columns holding numbers (see `number_field`) in rows of the Arrow schema to decimals"""
+    names = [field.name for field in schema if is_number_field(field)]
+    if not names:
+        return rows
+
+    def decode(row):
+        for name in names:
+            value = row.get(name)
+            if value is not None:
+                row[name] = decimal.Decimal(value)
+        return row
+    return map(decode, rows)
+
+
+def table_schema(schema):
+    """Table schema descriptor of an Arrow schema"""
+    import pyarrow as pa
+    fields = []
+    for arrow_field in schema:
+        t = arrow_field.type
+        if is_number_field(arrow_field):
+            field_type = 'number'
+        elif pa.types.is_boolean(t):
+            field_type = 'boolean'
+        elif pa.types.is_integer(t):
+            field_type = 'integer'
+        elif pa.types.is_floating(t) or pa.types.is_decimal(t):
+            field_type = 'number'
+        elif pa.types.is_string(t) or pa.types.is_large_string(t):
+            field_type = 'string'
+        elif pa.types.is_timestamp(t):
+            field_type = 'datetime'
+        elif pa.types.is_date(t):
+            field_type = 'date'
+        elif pa.types.is_time(t):
+            field_type = 'time'
+        elif pa.types.is_list(t) or pa.types.is_large_list(t) or pa.types.is_fixed_size_list(t):
+            field_type = 'array'
+        elif pa.types.is_struct(t):
+            field_type = 'object'
+        else:
+            field_type = 'any'
+        fields.append(dict(name=arrow_field.name, type=field_type))
+    return dict(fields=fields)
+
+
+def iter_batches(data):
+    import pyarrow as pa
+    if isinstance(data, pa.Table):
+        return data.to_batches()
+    elif isinstance(data, pa.RecordBatch):
+        return [data]
+    return data
+
+
+def iter_rows(data):
+    """Rows of an Arrow table, record batch or stream of record batches, as dicts"""
+    for batch in iter_batches(data):
+        yield from decode_numbers(batch.schema, batch.to_pylist())
+
+
+def arrow_schema(schema, columns, float_numbers=False, headroom=False):
+    """Arrow schema of a table schema descriptor, with the types of `number` fields inferred from their columns"""
+    import pyarrow as pa
+    types = arrow_types()
+    fields = []
+    for f in schema.get('fields', []):
+        field_type = f.get('type', 'string')
+        if field_type == 'number':
+            fields.append(number_field(f['name'], columns.get(f['name'], []), float_numbers, headroom))
+        else:
+            fields.append(pa.field(f['name'], types.get(field_type, pa.string())))
+    return pa.schema(fields)
+
+
+def to_batches(schema, rows, batch_size, float_numbers=False, target=None):
+    """Converts rows of a resource with the given table schema into Arrow record batches of up to `batch_size` rows
+
+    Unless an Arrow schema is given as `target`, the types of `number` fields are inferred from the first batch,
+    leaving room for larger numbers in later batches.
+    """
+    import pyarrow as pa
+    types = arrow_types()
+    field_types = [f.get('type', 'string') for f in schema.get('fields', [])]
+    serializers = [SERIALIZERS.get(t, None if t in types else str) for t in field_types]
+
+    def batch(batch_rows, target):
+        arrays = []
+        for f, field_type, serializer in zip(target, field_types, serializers):
+            # Columns are built with comprehensions, rather than value by value
+            values = [row.get(f.name) for row in batch_rows]
+            if field_type == 'number':
+                arrays.append(number_array(values, f.type))
+                continue
+            if serializer is not None:
+                values = [serializer(value) if value is not None else None for value in values]
+            arrays.append(pa.array(values, type=f.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=target)
+
+    rows = iter(rows)
+    while True:
+        batch_rows = list(itertools.islice(rows, batch_size))
+        if not batch_rows:
+            break
+        if target is None:
+            target = arrow_schema(schema, number_columns(schema, batch_rows), float_numbers, headroom=True)
+        yield batch(batch_rows, target)
+
+
+def number_columns(schema, rows):
+    return dict(
+        (f['name'], [row.get(f['name']) for row in rows])
+        for f in schema.get('fields', [])
+        if f.get('type') == 'number'
+    )
+
+
+def to_table(schema, rows, batch_size, float_numbers=False):
+    """Converts rows into an Arrow table, with the types of `number` fields inferred from all of their values"""
+    import pyarrow as pa
+    rows = list(rows)
+    target = arrow_schema(schema, number_columns(schema, rows), float_numbers)
+    return pa.Table.from_batches(list(to_batches(schema, rows, batch_size, target=target)), schema=target)
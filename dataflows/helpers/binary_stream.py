@@ -0,0 +1,127 @@
+import struct
+import pickle
+import zlib
+
+from .extended_json import ejson
+
+MAGIC = b'DFSTREAM1\n'
+CHUNK_HEADER = struct.Struct('<I')
+FOOTER_POINTER = struct.Struct('<Q')
+
+
+def get_codec(compression):
+    if compression is None:
+        return (lambda data: data), (lambda data: data)
+    elif compression in ('zlib', 'gzip'):
+        return (lambda data: zlib.compress(data, 1)), zlib.decompress
+    elif compression == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress
+    elif compression == 'lz4':
+        import lz4.frame
+        return lz4.frame.compress, lz4.frame.decompress
+    assert False, 'Unknown compression {!r}'.format(compression)
+
+
+def is_binary_stream(file):
+    pos = file.tell()
+    magic = file.read(len(MAGIC))
+    file.seek(pos)
+    return magic == MAGIC
+
+
+class BinaryStreamWriter(object):
+    """Writes resources as length-prefixed chunks of rows, followed by an index of all resources
+
+    Rows are stored as tuples of values, in the order of the resource's schema fields.
+    Rows which don't match the schema exactly are stored as is.
+    Each resource is added to the index when it starts, along with the offsets of its chunks, so resources whose rows
+    are not all consumed (or are consumed after the next resource started) are still indexed in order.
+    """
+
+    def __init__(self, file, compression=None, batch_size=1000):
+        self.file = file
+        self.compression = compression
+        self.compress, _ = get_codec(compression)
+        self.batch_size = batch_size
+        self.descriptor = None
+        self.index = []
+        self.batches = []
+        self.offset = 0
+        self.write(MAGIC)
+
+    def write(self, data):
+        self.file.write(data)
+        self.offset += len(data)
+
+    def write_chunk(self, entries):
+        data = self.compress(pickle.dumps(entries, protocol=pickle.HIGHEST_PROTOCOL))
+        self.write(CHUNK_HEADER.pack(len(data)))
+        self.write(data)
+
+    def write_descriptor(self, descriptor):
+        self.descriptor = descriptor
+
+    def write_batch(self, entry, batch):
+        if batch:
+            entry['offsets'].append(self.offset)
+            entry['rows'] += len(batch)
+            self.write_chunk(batch)
+            batch.clear()
+
+    def write_resource(self, name, field_names, rows):
+        field_set = set(field_names)
+        entry = dict(name=name, fields=field_names, offsets=[], rows=0)
+        self.index.append(entry)
+        batch = []
+        # Rows which were consumed are written on close, even if the rest of the resource isn't
+        self.batches.append((entry, batch))
+        for row in rows:
+            if row.keys() == field_set:
+                batch.append(tuple(row[f] for f in field_names))
+            else:
+                batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.write_batch(entry, batch)
+            yield row
+        self.write_batch(entry, batch)
+        self.file.flush()
+
+    def close(self):
+        for entry, batch in self.batches:
+            self.write_batch(entry, batch)
+        footer_offset = self.offset
+        footer = dict(descriptor=self.descriptor, compression=self.compression, resources=self.index)
+        self.write(ejson.dumps(footer, sort_keys=True, ensure_ascii=True).encode('ascii'))
+        self.write(FOOTER_POINTER.pack(footer_offset))
+        self.file.close()
+
+
+class BinaryStreamReader(object):
+
+    def __init__(self, file):
+        self.file = file
+        assert is_binary_stream(file), 'Not a binary stream'
+        file.seek(-FOOTER_POINTER.size, 2)
+        end = file.tell()
+        footer_offset, = FOOTER_POINTER.unpack(file.read(FOOTER_POINTER.size))
+        file.seek(footer_offset)
+        footer = ejson.loads(file.read(end - footer_offset).decode('ascii'))
+        self.descriptor = footer['descriptor']
+        self.index = footer['resources']
+        _, self.decompress = get_codec(footer['compression'])
+
+    def read_chunk(self):
+        size, = CHUNK_HEADER.unpack(self.file.read(CHUNK_HEADER.size))
+        return pickle.loads(self.decompress(self.file.read(size)))
+
+    def read_resource(self, entry):
+        field_names = entry['fields']
+        for offset in entry['offsets']:
+            # Other resources might have been written or read in between chunks
+            self.file.seek(offset)
+            for row in self.read_chunk():
+                if isinstance(row, tuple):
+                    yield dict(zip(field_names, row))
+                else:
+                    yield row
@@ -0,0 +1,294 @@
+import io
+import os
+import csv
+import codecs
+import bz2
+import gzip
+import mmap
+import operator
+import itertools
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from tabulator import config
+from tabulator.helpers import detect_encoding
+
+# Options which are handled the same way as in tabulator
+DIALECT_OPTIONS = {'delimiter', 'doublequote', 'escapechar', 'quotechar', 'quoting', 'skipinitialspace',
+                   'lineterminator'}
+STREAM_OPTIONS = {'format', 'compression', 'encoding', 'headers', 'skip_rows', 'ignore_blank_headers',
+                  'sample_size', 'force_strings', 'custom_parsers'}
+AUTO_SKIP_ROWS = [{'type': 'preset', 'value': 'auto'}]
+
+
+def parse_chunk(source, start, end, encoding, dialect):
+    """Parses the rows of a chunk, and whether its last row is incomplete (i.e. the chunk ends inside a quoted value)"""
+    exhausted = []
+
+    def lines(chars):
+        yield from chars
+        exhausted.append(True)
+
+    with open(source, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        chars = io.TextIOWrapper(io.BytesIO(mm[start:end]), encoding)
+        rows = []
+        partial = False
+        for row in csv.reader(lines(chars), **dialect):
+            # The reader only runs out of lines while reading a row if the row's value continues past the chunk
+            partial = bool(exhausted)
+            rows.append(row)
+        return rows, partial
+
+
+class CSVStream(object):
+    """Reads local CSV files (optionally gzip or bz2 compressed) with the csv module directly
+
+    Implements the parts of tabulator's Stream used by `load`, with the same semantics for the options `load` uses.
+    Rows are read in large buffers and are keyed without going through tabulator's row processors.
+    """
+
+    COMPRESSIONS = {
+        'gz': gzip.open,
+        'bz2': bz2.open,
+    }
+    BUFFER_SIZE = 1024 * 1024
+    # Uncompressed files are parsed in chunks of this size, when using more than one worker
+    CHUNK_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, source, format=None, compression=None, encoding=None, headers=1,
+                 skip_rows=None, ignore_blank_headers=False, sample_size=config.DEFAULT_SAMPLE_SIZE,
+                 force_strings=False, custom_parsers=None, workers=None, **dialect_options):
+        self.source = source
+        self.workers = workers
+        self.format = 'csv'
+        self.compression = compression or self.detect_compression(source)
+        self.encoding = encoding
+        self.skip_rows = skip_rows
+        self.ignore_blank_headers = ignore_blank_headers
+        self.sample_size = sample_size
+        self.dialect_options = dialect_options
+        self.dialect = None
+        self.headers = None
+        self.sample = None
+        self.sample_rows = []
+        self.headers_row = 0
+        self.ignored_indexes = set()
+        self.kept_values = None
+        self.row_length = 0
+        self.chars = None
+        self.reader = None
+
+    @classmethod
+    def detect_compression(cls, source):
+        extension = os.path.splitext(source)[1][1:].lower()
+        return extension if extension in cls.COMPRESSIONS else None
+
+    @classmethod
+    def supports(cls, source, options):
+        if not isinstance(source, str) or not os.path.isfile(source):
+            return False
+        if set(options) - STREAM_OPTIONS - DIALECT_OPTIONS:
+            return False
+        if options.get('headers', 1) != 1 or options.get('skip_rows', AUTO_SKIP_ROWS) != AUTO_SKIP_ROWS:
+            return False
+        if 'csv' in (options.get('custom_parsers') or {}):
+            return False
+        compression = options.get('compression') or cls.detect_compression(source)
+        if compression is not None and compression not in cls.COMPRESSIONS:
+            return False
+        source_format = options.get('format')
+        if source_format is None:
+            path = os.path.splitext(source)[0] if compression else source
+            source_format = os.path.splitext(path)[1][1:].lower()
+        return source_format == 'csv'
+
+    @property
+    def closed(self):
+        return self.chars is None or self.chars.closed
+
+    def open(self):
+        self.close()
+        if self.compression:
+            raw = io.BufferedReader(self.COMPRESSIONS[self.compression](self.source, 'rb'),
+                                    buffer_size=self.BUFFER_SIZE)
+        else:
+            raw = io.open(self.source, 'rb', buffering=self.BUFFER_SIZE)
+        self.encoding = detect_encoding(raw.peek(config.DEFAULT_BYTES_SAMPLE_SIZE)[:config.DEFAULT_BYTES_SAMPLE_SIZE],
+                                        self.encoding)
+        self.chars = io.TextIOWrapper(raw, self.encoding)
+        lines = []
+        for line in self.chars:
+            lines.append(line)
+            if len(lines) >= config.CSV_SAMPLE_LINES:
+                break
+        self.dialect = self.sniff_dialect(''.join(lines))
+        self.reader = csv.reader(itertools.chain(lines, self.chars), dialect=self.dialect)
+        self.read_sample()
+        return self
+
+    def close(self):
+        if not self.closed:
+            self.chars.close()
+
+    def sniff_dialect(self, sample):
+        try:
+            dialect = csv.Sniffer().sniff(sample, self.dialect_options.get('delimiter', ',\t;|'))
+            if not dialect.escapechar:
+                dialect.doublequote = True
+        except csv.Error:
+            class dialect(csv.excel):
+                pass
+        for key, value in self.dialect_options.items():
+            setattr(dialect, key, value)
+        if getattr(dialect, 'quotechar', None) == '':
+            setattr(dialect, 'quoting', csv.QUOTE_NONE)
+        return dialect
+
+    def read_sample(self):
+        rows = []
+        for row in self.reader:
+            rows.append(row)
+            if len(rows) >= self.sample_size:
+                break
+        if not rows:
+            self.headers, self.sample = [], []
+            return
+
+        # Leading rows which are shorter than most rows are not the headers ('auto' preset)
+        headers_row = 0
+        if self.skip_rows == AUTO_SKIP_ROWS:
+            lengths = []
+            for row in rows:
+                length = len(row)
+                while length > 0 and row[length - 1] == '':
+                    length -= 1
+                lengths.append(length)
+            most_common_length = Counter(lengths).most_common(1)[0][0]
+            while headers_row < len(rows) and lengths[headers_row] < most_common_length:
+                headers_row += 1
+
+        headers = [header.strip() for header in rows[headers_row]]
+        self.row_length = len(headers)
+        if self.ignore_blank_headers:
+            self.ignore(set(index for index, header in enumerate(headers) if header == ''))
+            headers = [header for header in headers if header != '']
+        self.headers = headers
+        self.headers_row = headers_row
+        self.sample_rows = rows[headers_row + 1:]
+        self.sample = [self.remove_ignored(row) for row in self.sample_rows]
+
+    def ignore(self, indexes):
+        self.ignored_indexes = set(indexes)
+        kept = [index for index in range(self.row_length) if index not in self.ignored_indexes]
+        self.kept_values = operator.itemgetter(*kept) if len(kept) > 1 else None
+
+    def select(self, names):
+        # Values of fields which aren't selected are ignored, like those of blank headers
+        indexes = [index for index in range(self.row_length) if index not in self.ignored_indexes]
+        self.ignore(self.ignored_indexes.union(
+            index for index, header in zip(indexes, self.headers) if header not in names
+        ))
+        self.headers = [header for header in self.headers if header in names]
+
+    def remove_ignored(self, row):
+        if not self.ignored_indexes:
+            return row
+        return [value for index, value in enumerate(row) if index not in self.ignored_indexes]
+
+    def keyed_values(self, row):
+        # Values past the last header are dropped when keying the row anyway
+        if self.kept_values is not None and len(row) >= self.row_length:
+            return self.kept_values(row)
+        return self.remove_ignored(row)
+
+    def key_rows(self, rows):
+        if self.ignored_indexes:
+            rows = map(self.keyed_values, rows)
+        # Rows are keyed with builtins rather than in a python loop
+        return map(dict, map(zip, itertools.repeat(self.headers), rows))
+
+    def iter(self, keyed=True):
+        assert keyed, 'Only keyed rows are supported'
+        if self.can_split():
+            # The whole file is parsed again in chunks, including the sample and the headers
+            yield from self.key_rows(itertools.islice(self.iter_chunks(), self.headers_row + 1, None))
+        else:
+            yield from self.key_rows(self.sample_rows)
+            yield from self.key_rows(self.reader)
+
+    def can_split(self):
+        if not self.workers or self.workers < 2 or self.compression or not self.headers:
+            return False
+        if os.path.getsize(self.source) <= self.CHUNK_SIZE:
+            return False
+        # Escaped quotes can't be told apart from quotes which start or end a value
+        if self.dialect.escapechar and self.dialect.quoting != csv.QUOTE_NONE:
+            return False
+        # Chunks are split on newlines and quotes, which must be single ascii bytes in the file's encoding
+        separators = '\n' + (self.dialect.quotechar or '')
+        encoder = codecs.getincrementalencoder(self.encoding)()
+        encoder.encode('')
+        try:
+            return encoder.encode(separators) == separators.encode('ascii')
+        except UnicodeError:
+            return False
+
+    def chunks(self):
+        # Chunks end on a newline which follows an even number of quotes, which usually isn't inside a quoted value.
+        # Quotes inside unquoted values (e.g. `5" tv`) throw the count off, so chunks are verified when parsed.
+        quote = None
+        if self.dialect.quoting != csv.QUOTE_NONE and self.dialect.quotechar:
+            quote = self.dialect.quotechar.encode('ascii')
+        with open(self.source, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            start = 0
+            while start < size:
+                end = start + self.CHUNK_SIZE
+                quotes = mm[start:end].count(quote) if quote else 0
+                while end < size:
+                    newline = mm.find(b'\n', end)
+                    if newline < 0:
+                        end = size
+                        break
+                    if quote:
+                        quotes += mm[end:newline].count(quote)
+                    end = newline + 1
+                    if quotes % 2 == 0:
+                        break
+                end = min(end, size)
+                yield start, end
+                start = end
+
+    def iter_chunks(self):
+        dialect = dict(
+            (key, getattr(self.dialect, key))
+            for key in ('delimiter', 'doublequote', 'escapechar', 'quotechar', 'quoting',
+                        'skipinitialspace', 'lineterminator')
+        )
+        size = os.path.getsize(self.source)
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        futures = deque()
+        try:
+            chunks = self.chunks()
+            while True:
+                # Up to `workers` chunks are parsed ahead of the one being consumed
+                for start, end in itertools.islice(chunks, self.workers + 1 - len(futures)):
+                    futures.append((start, end, executor.submit(parse_chunk, self.source, start, end,
+                                                                self.encoding, dialect)))
+                if not futures:
+                    break
+                start, end, future = futures.popleft()
+                rows, partial = future.result()
+                if partial and end < size:
+                    # Chunks start where the previous (complete) chunk ended, i.e. on a row boundary, so this is
+                    # the first chunk whose end isn't one. The rest of the file is parsed sequentially from its start
+                    yield from self.parse_from(start, dialect)
+                    break
+                yield from rows
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def parse_from(self, start, dialect):
+        with io.open(self.source, 'rb', buffering=self.BUFFER_SIZE) as raw:
+            raw.seek(start)
+            yield from csv.reader(io.TextIOWrapper(raw, self.encoding), **dialect)
@@ -1,9 +1,15 @@
 import datetime
+import re
 import json
 
 import decimal
 import isodate
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # On some platforms, pre year 1000 dates are not formatted using 4 digits (which is later unparseable)
 try:
     if datetime.date(1, 1, 1).strftime('%04Y') == '4Y':
@@ -25,6 +31,28 @@ DATETIME_P_FORMAT = '%Y-%m-%dT%H:%M:%S'
 TIME_P_FORMAT = TIME_F_FORMAT = TIME_FORMAT
 
 
+def decode_datetime(value):
+    (isoformat, tzofs, tzname) = value
+    parsed = datetime.datetime \
+        .strptime(isoformat, DATETIME_P_FORMAT)
+    if tzname is not None:
+        return datetime.datetime \
+            .combine(parsed.date(), parsed.time(),
+                     datetime.timezone(datetime.timedelta(seconds=tzofs), tzname))
+    else:
+        return parsed
+
+
+TYPE_DECODERS = {
+    'type{decimal}': decimal.Decimal,
+    'type{time}': lambda value: datetime.datetime.strptime(value, TIME_P_FORMAT).time(),
+    'type{datetime}': decode_datetime,
+    'type{date}': lambda value: datetime.datetime.strptime(value, DATE_P_FORMAT).date(),
+    'type{duration}': isodate.parse_duration,
+    'type{set}': set,
+}
+
+
 class CommonJSONDecoder(json.JSONDecoder):
     """
     Common JSON Encoder
@@ -33,49 +61,16 @@ class CommonJSONDecoder(json.JSONDecoder):
 
     @classmethod
     def object_hook(cls, obj):
-        if 'type{decimal}' in obj:
-            try:
-                return decimal.Decimal(obj['type{decimal}'])
-            except decimal.InvalidOperation:
-                pass
-        if 'type{time}' in obj:
-            try:
-                return datetime.datetime \
-                    .strptime(obj['type{time}'], TIME_P_FORMAT) \
-                    .time()
-            except ValueError:
-                pass
-        if 'type{datetime}' in obj:
-            try:
-                (isoformat, tzofs, tzname) = obj['type{datetime}']
-                parsed = datetime.datetime \
-                    .strptime(isoformat, DATETIME_P_FORMAT)
-                if tzname is not None:
-                    return datetime.datetime \
-                        .combine(parsed.date(), parsed.time(),
-                                 datetime.timezone(datetime.timedelta(seconds=tzofs), tzname))
-                else:
-                    return parsed
-            except ValueError:
-                pass
-        if 'type{date}' in obj:
-            try:
-                return datetime.datetime \
-                    .strptime(obj['type{date}'], DATE_P_FORMAT) \
-                    .date()
-            except ValueError:
-                pass
-        if 'type{duration}' in obj:
-            try:
-                return isodate.parse_duration(obj['type{duration}'])
-            except ValueError:
-                pass
-        if 'type{set}' in obj:
-            try:
-                return set(obj['type{set}'])
-            except ValueError:
-                pass
-
+        # Typed values are always wrapped in objects with a single key
+        if len(obj) != 1:
+            return obj
+        for key, value in obj.items():
+            decoder = TYPE_DECODERS.get(key)
+            if decoder is not None:
+                try:
+                    return decoder(value)
+                except (ValueError, decimal.InvalidOperation):
+                    pass
         return obj
 
     def __init__(self, **kwargs):
@@ -109,15 +104,119 @@ class CommonJSONEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+DECODER = CommonJSONDecoder()
+ENCODERS = {}
+
+
+def restore_types(obj):
+    """Converts typed value wrappers in an object which was decoded without the object_hook"""
+    if type(obj) is dict:
+        for k, v in obj.items():
+            if type(v) is dict or type(v) is list:
+                obj[k] = restore_types(v)
+        return CommonJSONDecoder.object_hook(obj)
+    elif type(obj) is list:
+        return [restore_types(v) if type(v) is dict or type(v) is list else v for v in obj]
+    return obj
+
+
+# orjson decodes integers outside of [-2**63, 2**64) as floats, so lines with long runs of digits
+# (which may or may not be such integers) are decoded with the json module
+LONG_DIGITS = re.compile(r'\d{20}|-\d{19}')
+LONG_DIGITS_BYTES = re.compile(rb'\d{20}|-\d{19}')
+
+
+def loads_line(line):
+    """Decodes a line of extended JSON, using orjson when it's available and decodes it losslessly"""
+    long_digits = LONG_DIGITS if isinstance(line, str) else LONG_DIGITS_BYTES
+    if orjson is not None and long_digits.search(line) is None:
+        try:
+            value = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            # e.g. NaN
+            pass
+        else:
+            # Typed values are always wrapped in objects with a `type{...}` key
+            marker = 'type{' if isinstance(line, str) else b'type{'
+            return restore_types(value) if marker in line else value
+    if isinstance(line, bytes):
+        line = line.decode('utf8')
+    return DECODER.decode(line)
+
+
+class SchemaRowCodec():
+    """
+    Encodes rows which match a table schema as JSON arrays of their values,
+    with typed values written as plain strings instead of wrapper objects.
+    """
+
+    # field type -> (can encode value, encode, decode)
+    CONVERTERS = {
+        'number': (lambda v: type(v) is decimal.Decimal,
+                   str, decimal.Decimal),
+        'date': (lambda v: type(v) is datetime.date,
+                 datetime.date.isoformat, datetime.date.fromisoformat),
+        'datetime': (lambda v: type(v) is datetime.datetime and v.tzinfo is None,
+                     datetime.datetime.isoformat, datetime.datetime.fromisoformat),
+        'time': (lambda v: type(v) is datetime.time and v.tzinfo is None,
+                 datetime.time.isoformat, datetime.time.fromisoformat),
+        'duration': (lambda v: isinstance(v, (datetime.timedelta, isodate.Duration)),
+                     isodate.duration_isoformat, isodate.parse_duration),
+    }
+
+    def __init__(self, schema):
+        fields = schema.get('fields', [])
+        self.names = [f['name'] for f in fields]
+        self.name_set = set(self.names)
+        self.converters = [
+            (i, self.CONVERTERS[f.get('type')])
+            for i, f in enumerate(fields)
+            if f.get('type') in self.CONVERTERS
+        ]
+        self.encoder = CommonJSONEncoder(ensure_ascii=True)
+
+    def encode(self, row):
+        """Returns None for rows which can't be encoded according to the schema"""
+        if row.keys() != self.name_set:
+            return None
+        values = [row[name] for name in self.names]
+        for i, (check, encode, _) in self.converters:
+            value = values[i]
+            if value is None:
+                continue
+            if check(value):
+                values[i] = encode(value)
+            elif isinstance(value, str):
+                # Would be mistaken for an encoded value
+                return None
+        return self.encoder.encode(values)
+
+    def decode(self, line):
+        values = loads_line(line)
+        for i, (_, _, decode) in self.converters:
+            value = values[i]
+            if type(value) is str:
+                values[i] = decode(value)
+        return dict(zip(self.names, values))
+
+
 class ejson():
 
     @staticmethod
     def dumps(*args, **kwargs):
+        if len(args) == 1 and set(kwargs) <= {'sort_keys', 'ensure_ascii'}:
+            key = (kwargs.get('sort_keys', False), kwargs.get('ensure_ascii', True))
+            encoder = ENCODERS.get(key)
+            if encoder is None:
+                encoder = ENCODERS[key] = CommonJSONEncoder(sort_keys=key[0], ensure_ascii=key[1])
+            return encoder.encode(args[0])
         kwargs['cls'] = CommonJSONEncoder
         return json.dumps(*args, **kwargs)
 
     @staticmethod
     def loads(*args, **kwargs):
+        if len(args) == 1 and not kwargs and isinstance(args[0], str):
+            return DECODER.decode(args[0])
         kwargs['cls'] = CommonJSONDecoder
         return json.loads(*args, **kwargs)
 
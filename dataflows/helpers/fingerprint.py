@@ -0,0 +1,148 @@
+import io
+import os
+import types
+import sqlite3
+import tempfile
+import threading
+import hashlib
+import decimal
+import datetime
+import functools
+from stat import S_ISREG
+
+from kvfile.base import KVFileBase
+from kvfile.cached import CachedKVFile
+
+# Runtime state of processors and checkpoints which doesn't affect their output
+IGNORED_ATTRIBUTES = {'stats', 'source', 'datapackage', 'position', 'current_fingerprint',
+                      'pushdown_steps', 'projections', 'predicates'}
+PLAIN_TYPES = (type(None), bool, int, float, complex, bytes, decimal.Decimal,
+               datetime.date, datetime.time, datetime.timedelta)
+# Runtime resources (e.g. the temporary key-value files and open files processors create when set up),
+# which are different every run but don't affect the output, are only identified by their type
+RUNTIME_TYPES = (KVFileBase, CachedKVFile, io.IOBase, tempfile.TemporaryDirectory, sqlite3.Connection,
+                 type(threading.Lock()), type(threading.RLock()))
+
+
+class Fingerprint(object):
+    """Computes a stable hash of a chain of steps and their configuration
+
+    Functions are hashed by their code, defaults and closure, objects by their class and attributes.
+    Strings which point to local files also hash the file's size and modification time,
+    so that a changed source file changes the fingerprint.
+    Runtime resources, like temporary key-value files, are only hashed by their type.
+    """
+
+    def __init__(self, seen=None):
+        self.hash = hashlib.md5()
+        # Values are kept referenced so that their ids are not reused while hashing
+        self.seen = {} if seen is None else seen
+
+    def update(self, *parts):
+        for part in parts:
+            self.hash.update(str(part).encode('utf8', 'surrogatepass'))
+            self.hash.update(b'\0')
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+    def add(self, value):
+        if isinstance(value, PLAIN_TYPES):
+            self.update(type(value).__name__, repr(value))
+        elif isinstance(value, str):
+            self.update('str', value)
+            self.add_file(value)
+        elif isinstance(value, RUNTIME_TYPES):
+            self.update('runtime', type(value).__name__)
+        elif isinstance(value, (type, types.ModuleType, types.BuiltinFunctionType)):
+            self.update(type(value).__name__, getattr(value, '__module__', None),
+                        getattr(value, '__qualname__', value.__name__))
+        elif id(value) in self.seen:
+            self.update('cycle', type(value).__name__)
+        else:
+            self.seen[id(value)] = value
+            self.add_compound(value)
+
+    def add_file(self, value):
+        if len(value) > 1024 or '\n' in value:
+            return
+        try:
+            stat = os.stat(value)
+        except (OSError, ValueError):
+            return
+        if not S_ISREG(stat.st_mode):
+            return
+        self.update('file', stat.st_size, stat.st_mtime_ns)
+
+    def add_compound(self, value):
+        if isinstance(value, (list, tuple)):
+            self.update(type(value).__name__, len(value))
+            for item in value:
+                self.add(item)
+        elif isinstance(value, (set, frozenset)):
+            self.update(type(value).__name__, len(value))
+            for item in sorted(self.nested(item) for item in value):
+                self.update(item)
+        elif isinstance(value, dict):
+            self.update('dict', len(value))
+            for item in sorted(repr(key) + self.nested(item) for key, item in value.items()):
+                self.update(item)
+        elif isinstance(value, types.FunctionType):
+            self.update('function', value.__module__, value.__qualname__)
+            self.add(value.__code__)
+            self.add(value.__defaults__)
+            self.add(value.__kwdefaults__)
+            self.add([cell.cell_contents for cell in value.__closure__ or [] if cell_is_set(cell)])
+        elif isinstance(value, functools.partial):
+            self.update('partial')
+            self.add(value.func)
+            self.add(value.args)
+            self.add(value.keywords)
+        elif isinstance(value, types.MethodType):
+            self.update('method')
+            self.add(value.__func__)
+            self.add(value.__self__)
+        elif isinstance(value, types.CodeType):
+            self.update('code', value.co_name, value.co_code, value.co_names)
+            self.add(value.co_consts)
+        elif isinstance(value, types.GeneratorType):
+            self.update('generator')
+            self.add(value.gi_code)
+            if value.gi_frame is not None:
+                # Only the arguments the generator was created with, not its running state
+                code = value.gi_code
+                args = code.co_varnames[:code.co_argcount + code.co_kwonlyargcount]
+                f_locals = value.gi_frame.f_locals
+                self.add(dict((k, f_locals.get(k)) for k in args))
+        elif hasattr(value, '__dict__'):
+            cls = type(value)
+            self.update('object', cls.__module__, cls.__qualname__)
+            self.add(dict(
+                (k, v) for k, v in vars(value).items()
+                if k not in IGNORED_ATTRIBUTES
+            ))
+        elif type(value).__repr__ is not object.__repr__:
+            self.update(type(value).__name__, repr(value))
+        else:
+            # Iterators and other opaque objects can only be identified by their type
+            self.update(type(value).__name__)
+
+    def nested(self, value):
+        # Unordered collections are hashed item by item, then combined in a stable order
+        nested = Fingerprint(self.seen)
+        nested.add(value)
+        return nested.hexdigest()
+
+
+def cell_is_set(cell):
+    try:
+        cell.cell_contents
+        return True
+    except ValueError:
+        return False
+
+
+def fingerprint(value):
+    ret = Fingerprint()
+    ret.add(value)
+    return ret.hexdigest()
@@ -6,6 +6,8 @@ from datapackage import Package, Resource
 from tableschema.storage import Storage
 
 from .. import DataStreamProcessor
+from ..base.schema_validator import schema_validator
+from .arrow import is_arrow, table_schema, iter_rows
 
 
 class iterable_storage(Storage):
@@ -103,6 +105,16 @@ class iterable_loader(DataStreamProcessor):
         name = self.name
         if name is None:
             name = 'res_{}'.format(len(dp.resources) + 1)
+        if is_arrow(self.iterable):
+            # The schema of Arrow data is known, so no rows are sampled
+            self.res = Resource(dict(
+                name=name,
+                path='{}.csv'.format(name),
+                profile='tabular-data-resource',
+                schema=table_schema(self.iterable.schema)
+            ))
+            dp.descriptor.setdefault('resources', []).append(self.res.descriptor)
+            return dp
         self.res = Resource(dict(
             name=name,
             path='{}.csv'.format(name)
@@ -115,4 +127,8 @@ class iterable_loader(DataStreamProcessor):
 
     def process_resources(self, resources):
         yield from super(iterable_loader, self).process_resources(resources)
-        yield self.res.iter(keyed=True)
+        if is_arrow(self.iterable):
+            # Values are typed already, except for numbers which aren't decimals
+            yield schema_validator(self.res.descriptor, iter_rows(self.iterable))
+        else:
+            yield self.res.iter(keyed=True)
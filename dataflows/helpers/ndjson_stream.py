@@ -0,0 +1,235 @@
+import io
+import os
+import mmap
+import codecs
+import decimal
+import datetime
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from tabulator import config
+
+from .csv_stream import CSVStream, AUTO_SKIP_ROWS
+from .extended_json import loads_line
+
+FORMATS = {'ndjson', 'jsonl'}
+STREAM_OPTIONS = {'format', 'compression', 'encoding', 'headers', 'skip_rows', 'ignore_blank_headers',
+                  'sample_size', 'force_strings', 'custom_parsers'}
+
+
+def decode_chunk(source, start, end):
+    with open(source, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[start:end]
+    if start == 0 and data.startswith(codecs.BOM_UTF8):
+        data = data[len(codecs.BOM_UTF8):]
+    return [loads_line(line) for line in data.splitlines() if line.strip()]
+
+
+def to_decimal(value):
+    # The same decimal tableschema casts a number to
+    if type(value) is float or type(value) is int:
+        return decimal.Decimal(repr(value))
+    return value
+
+
+# Strings in the exact shape of the default formats of tableschema's temporal types are parsed with fromisoformat,
+# which gives the same values as strptime. Other values are left for the schema validator
+def to_date(value):
+    if type(value) is str and len(value) == 10 and value[4] == '-' and value[7] == '-':
+        try:
+            return datetime.date.fromisoformat(value)
+        except ValueError:
+            pass
+    return value
+
+
+def to_datetime(value):
+    if type(value) is str and len(value) == 20 and value[4] == '-' and value[7] == '-' and value[10] == 'T' \
+            and value[13] == ':' and value[16] == ':' and value[19] == 'Z':
+        try:
+            return datetime.datetime.fromisoformat(value[:19])
+        except ValueError:
+            pass
+    return value
+
+
+def to_time(value):
+    if type(value) is str and len(value) == 8 and value[2] == ':' and value[5] == ':':
+        try:
+            return datetime.time.fromisoformat(value)
+        except ValueError:
+            pass
+    return value
+
+
+# field type -> (formats, converter)
+CONVERTERS = {
+    'number': (None, to_decimal),
+    'date': (('default', '%Y-%m-%d'), to_date),
+    'datetime': (('default', '%Y-%m-%dT%H:%M:%SZ'), to_datetime),
+    'time': (('default', '%H:%M:%S'), to_time),
+}
+
+
+class NDJSONStream(object):
+    """Reads local newline delimited JSON files (optionally gzip or bz2 compressed) line by line
+
+    Implements the parts of tabulator's Stream used by `load`, like CSVStream.
+    Lines are decoded as extended JSON (the format written by `stream`), so typed values are restored.
+    """
+
+    COMPRESSIONS = CSVStream.COMPRESSIONS
+    BUFFER_SIZE = CSVStream.BUFFER_SIZE
+    # Uncompressed files are decoded in chunks of this size, when using more than one worker
+    CHUNK_SIZE = 16 * 1024 * 1024
+
+    def __init__(self, source, format=None, compression=None, encoding=None, headers=1,
+                 skip_rows=None, ignore_blank_headers=False, sample_size=config.DEFAULT_SAMPLE_SIZE,
+                 force_strings=False, custom_parsers=None, workers=None):
+        self.source = source
+        self.workers = workers
+        self.format = format or self.detect_format(source)
+        self.compression = compression or CSVStream.detect_compression(source)
+        self.encoding = 'utf-8'
+        self.sample_size = sample_size
+        self.headers = None
+        self.sample = None
+        self.sample_rows = []
+        self.keyed_source = True
+        self.converters = []
+        self.lines = None
+
+    @classmethod
+    def detect_format(cls, source):
+        path = source
+        if CSVStream.detect_compression(source):
+            path = os.path.splitext(source)[0]
+        return os.path.splitext(path)[1][1:].lower()
+
+    @classmethod
+    def supports(cls, source, options):
+        if not isinstance(source, str) or not os.path.isfile(source):
+            return False
+        if set(options) - STREAM_OPTIONS or options.get('force_strings'):
+            return False
+        if options.get('headers', 1) != 1 or options.get('skip_rows', AUTO_SKIP_ROWS) != AUTO_SKIP_ROWS:
+            return False
+        if options.get('encoding', 'utf-8').lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return False
+        compression = options.get('compression') or CSVStream.detect_compression(source)
+        if compression is not None and compression not in cls.COMPRESSIONS:
+            return False
+        source_format = options.get('format') or cls.detect_format(source)
+        if source_format not in FORMATS or source_format in (options.get('custom_parsers') or {}):
+            return False
+        return True
+
+    @property
+    def closed(self):
+        return self.lines is None or self.lines.closed
+
+    def open(self):
+        self.close()
+        if self.compression:
+            self.lines = io.BufferedReader(self.COMPRESSIONS[self.compression](self.source, 'rb'),
+                                           buffer_size=self.BUFFER_SIZE)
+        else:
+            self.lines = io.open(self.source, 'rb', buffering=self.BUFFER_SIZE)
+        self.read_sample()
+        return self
+
+    def close(self):
+        if not self.closed:
+            self.lines.close()
+
+    def read_sample(self):
+        if self.lines.peek(len(codecs.BOM_UTF8)).startswith(codecs.BOM_UTF8):
+            self.lines.read(len(codecs.BOM_UTF8))
+        rows = []
+        for line in self.lines:
+            if line.strip():
+                rows.append(loads_line(line))
+                if len(rows) >= self.sample_size:
+                    break
+        if not rows:
+            self.headers, self.sample = [], []
+            return
+        if isinstance(rows[0], dict):
+            # Like tabulator, the headers are the keys of the first row, sorted
+            self.headers = sorted(rows[0].keys())
+            self.sample_rows = rows
+        else:
+            # Rows are arrays, the first of which holds the headers
+            self.keyed_source = False
+            self.headers = [str(header).strip() for header in rows[0]]
+            self.sample_rows = rows[1:]
+        self.sample = [
+            [row.get(header) for header in self.headers] if isinstance(row, dict) else list(row)
+            for row in self.sample_rows
+        ]
+
+    def cast(self, schema):
+        """Decodes values of numeric and temporal fields into their types,
+        instead of leaving them for the schema validator
+        """
+        self.converters = []
+        for field in schema.get('fields', []):
+            formats, converter = CONVERTERS.get(field.get('type'), ((), None))
+            if converter is not None and (formats is None or field.get('format', 'default') in formats):
+                self.converters.append((field['name'], converter))
+
+    def convert(self, rows):
+        headers = self.headers
+        for row in rows:
+            if self.keyed_source:
+                # Like tabulator, objects are projected onto the headers: other keys are dropped, missing ones are null
+                row = dict(zip(headers, map(row.get, headers)))
+            else:
+                row = dict(zip(headers, row))
+            for name, converter in self.converters:
+                value = row.get(name)
+                if value is not None:
+                    row[name] = converter(value)
+            yield row
+
+    def iter(self, keyed=True):
+        assert keyed, 'Only keyed rows are supported'
+        if self.can_split():
+            # The whole file is decoded again in chunks, including the sample
+            rows = self.iter_chunks()
+            if not self.keyed_source:
+                next(rows, None)
+        else:
+            rows = itertools.chain(self.sample_rows, map(loads_line, filter(bytes.strip, self.lines)))
+        yield from self.convert(rows)
+
+    def can_split(self):
+        if not self.workers or self.workers < 2 or self.compression:
+            return False
+        return os.path.getsize(self.source) > self.CHUNK_SIZE
+
+    def chunks(self):
+        # JSON values can't contain raw newlines, so chunks end on any newline
+        with open(self.source, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            start = 0
+            while start < size:
+                end = mm.find(b'\n', min(start + self.CHUNK_SIZE, size - 1))
+                end = size if end < 0 else end + 1
+                yield start, end
+                start = end
+
+    def iter_chunks(self):
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        futures = deque()
+        try:
+            # Up to `workers` chunks are decoded ahead of the one being consumed
+            for start, end in self.chunks():
+                futures.append(executor.submit(decode_chunk, self.source, start, end))
+                if len(futures) > self.workers:
+                    yield from futures.popleft().result()
+            while futures:
+                yield from futures.popleft().result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
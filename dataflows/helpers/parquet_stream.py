@@ -0,0 +1,165 @@
+import os
+
+from tabulator import config
+from tabulator.helpers import stringify_value
+
+from .arrow import decode_numbers
+
+STREAM_OPTIONS = {'format', 'encoding', 'headers', 'skip_rows', 'ignore_blank_headers',
+                  'sample_size', 'force_strings', 'custom_parsers'}
+
+
+def compare(a, b):
+    # Values which can't be compared (e.g. naive and aware datetimes) are considered different
+    try:
+        return (a > b) - (a < b)
+    except TypeError:
+        return None
+
+
+class ColumnStatistics(object):
+    """Statistics of a column in a single row group, for checking whether any of its rows may match a condition"""
+
+    def __init__(self, statistics):
+        self.statistics = statistics
+
+    def may_equal(self, value):
+        statistics = self.statistics
+        if statistics is None:
+            return True
+        if value is None:
+            return not statistics.has_null_count or statistics.null_count > 0
+        if not statistics.has_min_max:
+            return True
+        low, high = compare(value, statistics.min), compare(value, statistics.max)
+        return low is None or high is None or (low >= 0 and high <= 0)
+
+    def may_differ(self, value):
+        statistics = self.statistics
+        if statistics is None:
+            return True
+        if value is None:
+            # The number of values doesn't include nulls
+            return statistics.num_values > 0
+        if not statistics.has_min_max or not statistics.has_null_count or statistics.null_count > 0:
+            return True
+        return compare(value, statistics.min) != 0 or compare(value, statistics.max) != 0
+
+
+class ParquetStream(object):
+    """Reads local Parquet files, one batch of rows at a time
+
+    Implements the parts of tabulator's Stream used by `load`, like CSVStream.
+    Only the selected columns are read, and row groups which can't match the pushed down filters are skipped,
+    based on the statistics stored in the file.
+    """
+
+    FORMATS = {'parquet'}
+    BATCH_SIZE = 64 * 1024
+
+    def __init__(self, source, format=None, encoding=None, headers=1, skip_rows=None, ignore_blank_headers=False,
+                 sample_size=config.DEFAULT_SAMPLE_SIZE, force_strings=False, custom_parsers=None, workers=None):
+        self.source = source
+        self.format = 'parquet'
+        self.encoding = encoding
+        self.ignore_blank_headers = ignore_blank_headers
+        self.sample_size = sample_size
+        self.force_strings = force_strings
+        self.workers = workers
+        self.headers = None
+        self.sample = None
+        self.filters = []
+        self.file = None
+
+    @classmethod
+    def supports(cls, source, options):
+        if not isinstance(source, str) or not os.path.isfile(source):
+            return False
+        if set(options) - STREAM_OPTIONS:
+            return False
+        source_format = options.get('format') or os.path.splitext(source)[1][1:].lower()
+        if source_format not in cls.FORMATS or source_format in (options.get('custom_parsers') or {}):
+            return False
+        return True
+
+    @property
+    def closed(self):
+        return self.file is None
+
+    def open(self):
+        import pyarrow.parquet as pq
+        self.close()
+        self.file = pq.ParquetFile(self.source, memory_map=True)
+        # Parquet files don't have header rows, the headers are the names of the columns
+        self.headers = [name for name in self.file.schema_arrow.names if name or not self.ignore_blank_headers]
+        self.read_sample()
+        return self
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def read_sample(self):
+        self.sample = []
+        batches = self.file.iter_batches(batch_size=min(self.sample_size, self.BATCH_SIZE) or 1,
+                                         columns=self.headers, use_threads=False)
+        for batch in batches:
+            for row in self.decode(batch):
+                values = [row[header] for header in self.headers]
+                self.sample.append(list(map(stringify_value, values)) if self.force_strings else values)
+            if len(self.sample) >= self.sample_size:
+                break
+        del self.sample[self.sample_size:]
+
+    def select(self, names):
+        self.headers = [header for header in self.headers if header in names]
+
+    def filter(self, filters):
+        """Skips row groups in which no row can match all of the filters (in the form of filter_rows' conditions)
+
+        Rows of the other row groups are not filtered, so the filters are still checked for each row.
+        """
+        self.filters = filters
+
+    def may_match(self, row_group):
+        statistics = {}
+        for index in range(row_group.num_columns):
+            column = row_group.column(index)
+            statistics[column.path_in_schema] = ColumnStatistics(column.statistics if column.is_stats_set else None)
+        for f in self.filters:
+            # Same as filter_rows: a row matches if any of the conditions holds
+            matched = any(
+                statistics[k].may_equal(v) if k in statistics else True
+                for o in f.get('equals', [])
+                for k, v in o.items()
+            ) or any(
+                statistics[k].may_differ(v) if k in statistics else True
+                for o in f.get('not_equals', [])
+                for k, v in o.items()
+            )
+            if not matched:
+                return False
+        return True
+
+    def row_groups(self):
+        metadata = self.file.metadata
+        return [index for index in range(metadata.num_row_groups) if self.may_match(metadata.row_group(index))]
+
+    def iter(self, keyed=True):
+        assert keyed, 'Only keyed rows are supported'
+        row_groups = self.row_groups() if self.filters else None
+        if row_groups == []:
+            return
+        batches = self.file.iter_batches(batch_size=self.BATCH_SIZE, row_groups=row_groups, columns=self.headers,
+                                         use_threads=bool(self.workers and self.workers > 1))
+        for batch in batches:
+            if self.force_strings:
+                for row in self.decode(batch):
+                    yield dict((k, stringify_value(v)) for k, v in row.items())
+            else:
+                yield from self.decode(batch)
+
+    def decode(self, batch):
+        # Numbers written as strings (e.g. by the Parquet dump format) are read as decimals
+        return decode_numbers(batch.schema, batch.to_pylist())
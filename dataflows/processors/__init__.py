@@ -6,6 +6,8 @@ from .dumpers import dump_to_path, dump_to_zip, dump_to_sql
 
 from .add_computed_field import add_computed_field
 from .add_field import add_field
+from .aggregate import aggregate
+from .cacheable import cacheable
 from .checkpoint import checkpoint
 from .concatenate import concatenate
 from .conditional import conditional
@@ -30,3 +32,4 @@ from .update_package import update_package, add_metadata
 from .update_resource import update_resource
 from .update_schema import update_schema
 from .update_stats import update_stats
+from .window import window
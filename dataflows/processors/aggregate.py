@@ -0,0 +1,161 @@
+import copy
+import pickle
+import tempfile
+
+from dataflows import PackageWrapper, ResourceWrapper
+
+from ..helpers.resource_matcher import ResourceMatcher
+from .join import AGGREGATORS, fix_fields, expand_fields, order_fields
+
+
+NUM_PARTITIONS = 16
+
+
+# Group state helpers
+def update_state(state, row, fields):
+    for field, spec in fields.items():
+        agg = spec['aggregate']
+        if agg != 'count':
+            new = row.get(spec['name'])
+        else:
+            new = ''
+        if new is not None:
+            state[field] = AGGREGATORS[agg].func(state.get(field), new)
+        elif field not in state:
+            state[field] = None
+
+
+def finalise_state(key, state, group_by, fields):
+    row = dict(zip(group_by, key))
+    row.update(
+        (k, AGGREGATORS[spec['aggregate']].finaliser(state.get(k)))
+        for k, spec in fields.items()
+    )
+    return row
+
+
+# Spill helpers
+class Partition(object):
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile()
+        self.count = 0
+
+    def write(self, row):
+        pickle.dump(row, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.count += 1
+
+    def __iter__(self):
+        self.file.seek(0)
+        try:
+            for _ in range(self.count):
+                yield pickle.load(self.file)
+        finally:
+            self.file.close()
+
+
+# Aggregation strategies
+def hash_aggregator(rows, group_by, fields, max_groups, depth=0):
+    groups = {}
+    partitions = None
+    for row in rows:
+        key = tuple(row.get(k) for k in group_by)
+        state = groups.get(key)
+        if state is None:
+            if len(groups) >= max_groups:
+                # Keep updating the groups we already have, spill rows of new groups to disk
+                if partitions is None:
+                    partitions = [Partition() for _ in range(NUM_PARTITIONS)]
+                partitions[hash((depth, key)) % NUM_PARTITIONS].write(row)
+                continue
+            state = groups[key] = {}
+        update_state(state, row, fields)
+
+    for key, state in groups.items():
+        yield finalise_state(key, state, group_by, fields)
+    groups.clear()
+
+    if partitions is not None:
+        for partition in partitions:
+            if partition.count > 0:
+                yield from hash_aggregator(partition, group_by, fields, max_groups, depth + 1)
+
+
+def sorted_aggregator(rows, group_by, fields):
+    current_key = None
+    state = None
+    for row in rows:
+        key = tuple(row.get(k) for k in group_by)
+        if state is not None and key != current_key:
+            yield finalise_state(current_key, state, group_by, fields)
+            state = None
+        if state is None:
+            current_key, state = key, {}
+        update_state(state, row, fields)
+    if state is not None:
+        yield finalise_state(current_key, state, group_by, fields)
+
+
+# Descriptor helpers
+def process_schema(schema, group_by, fields):
+    schema_fields = schema.get('fields', [])
+    source_fields = dict((f['name'], f) for f in schema_fields)
+    new_fields = []
+    for name in group_by:
+        assert name in source_fields, \
+            'Failed to find group_by field {} in schema'.format(name)
+        new_fields.append(source_fields[name])
+    for name, spec in fields.items():
+        agg = spec['aggregate']
+        assert agg in AGGREGATORS, 'Unknown aggregation {}'.format(agg)
+        data_type = AGGREGATORS[agg].dataType
+        to_copy = {}
+        if data_type is None:
+            source_field = source_fields.get(spec['name'])
+            if source_field is None:
+                raise KeyError('Failed to find field with name %s' % spec['name'])
+            if AGGREGATORS[agg].copyProperties:
+                to_copy = copy.deepcopy(source_field)
+            data_type = source_field['type']
+        to_copy.update({
+            'name': name,
+            'type': data_type
+        })
+        new_fields.append(to_copy)
+    schema['fields'] = new_fields
+    if group_by:
+        schema['primaryKey'] = list(group_by)
+    else:
+        schema.pop('primaryKey', None)
+
+
+def aggregate(group_by, fields, resources=None, sorted_input=False, max_groups=100000):
+
+    def func(package: PackageWrapper):
+        matcher = ResourceMatcher(resources, package.pkg)
+        configuration = {}
+        for resource in package.pkg.descriptor['resources']:
+            if matcher.match(resource['name']):
+                schema = resource.setdefault('schema', {})
+                schema_fields = [
+                    f for f in schema.get('fields', [])
+                    if f['name'] not in group_by
+                ]
+                res_fields = fix_fields(copy.deepcopy(fields))
+                expand_fields(res_fields, schema_fields)
+                res_fields = order_fields(res_fields, schema_fields)
+                process_schema(schema, group_by, res_fields)
+                configuration[resource['name']] = res_fields
+        yield package.pkg
+
+        resource: ResourceWrapper
+        for resource in package:
+            res_fields = configuration.get(resource.res.name)
+            if res_fields is None:
+                yield resource
+            elif sorted_input:
+                yield sorted_aggregator(resource, group_by, res_fields)
+            else:
+                yield hash_aggregator(resource, group_by, res_fields, max_groups)
+
+    return func
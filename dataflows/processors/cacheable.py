@@ -0,0 +1,29 @@
+import os
+import itertools
+from ..helpers.fingerprint import fingerprint as chain_fingerprint
+from .checkpoint import checkpoint
+
+
+class cacheable(checkpoint):
+
+    def __init__(self, *steps, cache_path='.cache', max_size=None, max_age=None,
+                 format='binary', compression=None):
+        super().__init__('cacheable', checkpoint_path=cache_path, steps=steps,
+                         format=format, compression=compression, max_age=max_age, max_size=max_size)
+
+    @property
+    def checkpoint_path(self):
+        # Results are stored by the fingerprint of all the steps which produced them
+        return os.path.join(self.base_path, self.current_fingerprint)
+
+    def calc_fingerprint(self, chain):
+        return chain_fingerprint(chain)
+
+    def _preprocess_chain(self):
+        if len(self.chain) == 0:
+            return self.chain
+        return super()._preprocess_chain()
+
+    def handle_flow_checkpoint(self, parent_chain):
+        self.chain = list(itertools.chain(parent_chain, self.steps))
+        return [self]
@@ -1,7 +1,15 @@
 import os
+import json
+import time
+import shutil
 import itertools
-from dataflows import Flow
-from .stream import stream
+import collections
+from datapackage import Package
+from dataflows import Flow, PackageWrapper, ResourceWrapper
+from ..helpers.extended_json import ejson
+from ..helpers.fingerprint import fingerprint as chain_fingerprint
+from ..helpers.resource_matcher import ResourceMatcher
+from .stream import stream, ACTIVE_SUFFIX
 from .unstream import unstream
 
 
@@ -16,32 +24,260 @@ def _notify_checkpoint_saved(checkpoint_name):
     return step
 
 
+def _save_resource(filename, descriptor, resource: ResourceWrapper, format, compression):
+    # Each resource is saved as a stream of a package with only that resource
+    package = PackageWrapper(Package(dict(descriptor, resources=[resource.res.descriptor])))
+    package.it = iter([resource])
+    writer = stream(filename, format=format, compression=compression)(package)
+    next(writer)
+    yield from next(writer)
+    # Closes the file and moves it into place
+    for _ in writer:
+        pass
+
+
+def _load_resource(filename):
+    reader = unstream(filename)(None)
+    next(reader)
+    yield from next(reader)
+
+
+def _replay_resource(filename, resource: ResourceWrapper, drain):
+    # When a later resource is produced by the previous steps, they might produce it from the rows of this one
+    # (e.g. duplicate() or join() with source_delete=False), so its rows are still iterated. The saved rows are used
+    if drain:
+        collections.deque(resource, maxlen=0)
+    yield from _load_resource(filename)
+
+
+def _directory_size(path):
+    size = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            size += os.path.getsize(os.path.join(dirpath, filename))
+    return size
+
+
 class checkpoint(Flow):
 
-    def __init__(self, checkpoint_name, checkpoint_path='.checkpoints', steps=None, resources=None):
+    # Checkpoints saved in a single file by older versions
+    FILENAMES = {
+        'ndjson': 'stream.ndjson',
+        'binary': 'stream.bin',
+    }
+    EXTENSIONS = {
+        'ndjson': '.ndjson',
+        'binary': '.bin',
+    }
+    METADATA_FILENAME = 'checkpoint.json'
+    DESCRIPTOR_FILENAME = 'datapackage.json'
+    RESOURCES_DIR = 'resources'
+
+    def __init__(self, checkpoint_name, checkpoint_path='.checkpoints', steps=None, resources=None,
+                 format='ndjson', compression=None, fingerprint=None, max_age=None, max_size=None):
         if not steps:
             steps = []
         super().__init__(*steps)
+        self.steps = tuple(steps)
         self.checkpoint_name = checkpoint_name
-        self.checkpoint_path = os.path.join(checkpoint_path, checkpoint_name)
+        self.base_path = checkpoint_path
         self.resources = resources
+        assert format in self.FILENAMES, 'Unknown checkpoint format {!r}'.format(format)
+        self.format = format
+        self.compression = compression
+        self.fingerprint = fingerprint
+        self.max_age = max_age
+        self.max_size = max_size
+        self.current_fingerprint = None
+
+    @property
+    def checkpoint_path(self):
+        return os.path.join(self.base_path, self.checkpoint_name)
 
     @property
     def filename(self):
-        return os.path.join(self.checkpoint_path, 'stream.ndjson')
+        return os.path.join(self.checkpoint_path, self.FILENAMES[self.format])
+
+    @property
+    def metadata_filename(self):
+        return os.path.join(self.checkpoint_path, self.METADATA_FILENAME)
+
+    @property
+    def descriptor_filename(self):
+        return os.path.join(self.checkpoint_path, self.DESCRIPTOR_FILENAME)
+
+    def existing_filename(self):
+        # Checkpoints saved in any format can be restored
+        for filename in [self.filename] + [os.path.join(self.checkpoint_path, f) for f in self.FILENAMES.values()]:
+            if os.path.exists(filename):
+                return filename
+        return None
+
+    def resource_filename(self, name):
+        filenames = [
+            os.path.join(self.checkpoint_path, self.RESOURCES_DIR, name + ext)
+            for ext in [self.EXTENSIONS[self.format]] + list(self.EXTENSIONS.values())
+        ]
+        for filename in filenames:
+            if os.path.exists(filename):
+                return filename
+        return filenames[0]
 
     def exists(self):
-        return os.path.exists(self.filename)
+        return self.existing_filename() is not None or self.read_metadata().get('complete', False)
+
+    def read_metadata(self):
+        try:
+            with open(self.metadata_filename) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def write_metadata(self, **kwargs):
+        metadata = self.read_metadata()
+        metadata.update(kwargs)
+        with open(self.metadata_filename + ACTIVE_SUFFIX, 'w') as f:
+            json.dump(metadata, f)
+        os.replace(self.metadata_filename + ACTIVE_SUFFIX, self.metadata_filename)
+
+    def write_descriptor(self, descriptor):
+        with open(self.descriptor_filename + ACTIVE_SUFFIX, 'w') as f:
+            f.write(ejson.dumps(descriptor, sort_keys=True, ensure_ascii=True))
+        os.replace(self.descriptor_filename + ACTIVE_SUFFIX, self.descriptor_filename)
+
+    def read_descriptor(self):
+        with open(self.descriptor_filename) as f:
+            return ejson.loads(f.read())
+
+    def calc_fingerprint(self, chain):
+        if self.fingerprint is False or len(chain) == 0:
+            return None
+        elif self.fingerprint is not None:
+            return str(self.fingerprint)
+        return chain_fingerprint(chain)
+
+    def is_valid(self):
+        metadata = self.read_metadata()
+        if self.max_age is not None:
+            legacy_filename = self.existing_filename()
+            created = metadata.get('created')
+            if created is None and legacy_filename is not None:
+                created = os.path.getmtime(legacy_filename)
+            if created is not None and time.time() - created > self.max_age:
+                return False
+        # Without any steps to run (or when disabled) there's nothing to compare against
+        if self.current_fingerprint is None:
+            return True
+        return metadata.get('fingerprint') == self.current_fingerprint
+
+    def on_saved(self, all_resources):
+        self.write_metadata(complete=True, all_resources=all_resources)
+        self.evict()
+
+    def evict(self):
+        if self.max_age is None and self.max_size is None:
+            return
+        now = time.time()
+        others = []
+        total_size = _directory_size(self.checkpoint_path)
+        for name in os.listdir(self.base_path):
+            path = os.path.join(self.base_path, name)
+            if os.path.samefile(path, self.checkpoint_path):
+                continue
+            files = [os.path.join(path, f) for f in [self.METADATA_FILENAME] + list(self.FILENAMES.values())]
+            files = [f for f in files if os.path.isfile(f)]
+            if len(files) == 0:
+                # Not a checkpoint
+                continue
+            last_used = max(os.path.getmtime(f) for f in files)
+            if self.max_age is not None and now - last_used > self.max_age:
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            size = _directory_size(path)
+            total_size += size
+            others.append((last_used, size, path))
+        if self.max_size is not None:
+            # Least recently used checkpoints are evicted first
+            for _, size, path in sorted(others):
+                if total_size <= self.max_size:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total_size -= size
+
+    def restore(self):
+
+        def step(package):
+            descriptor = self.read_descriptor()
+            descriptor['resources'] = [
+                resource for resource in descriptor['resources']
+                if os.path.exists(self.resource_filename(resource['name']))
+            ]
+            yield Package(descriptor)
+            for resource in descriptor['resources']:
+                yield _load_resource(self.resource_filename(resource['name']))
+
+        return step
+
+    def saver(self):
+
+        def step(package: PackageWrapper):
+            matcher = ResourceMatcher(self.resources, package.pkg)
+            self.write_descriptor(package.pkg.descriptor)
+            yield package.pkg
+
+            # Resources which were saved in a previous run are restored, the others are produced by the previous steps
+            names = [resource.name for resource in package.pkg.resources]
+            restored = [
+                matcher.match(name) and os.path.exists(self.resource_filename(name))
+                for name in names
+            ]
+            last_produced = max((i for i, r in enumerate(restored) if not r), default=-1)
+
+            all_resources = True
+            for i, resource in enumerate(package):
+                filename = self.resource_filename(resource.res.name)
+                if not matcher.match(resource.res.name):
+                    all_resources = False
+                    yield resource
+                elif restored[i]:
+                    yield _replay_resource(filename, resource, drain=i < last_produced)
+                else:
+                    yield _save_resource(filename, package.pkg.descriptor, resource,
+                                         self.format, self.compression)
+            self.on_saved(all_resources)
+
+        return step
 
     def _preprocess_chain(self):
-        if os.path.exists(self.filename):
+        chain = list(self.chain)
+        self.current_fingerprint = self.calc_fingerprint(chain)
+        if os.path.exists(self.checkpoint_path) and not self.is_valid():
+            print('checkpoint is out of date, removing: {}'.format(self.checkpoint_path))
+            shutil.rmtree(self.checkpoint_path)
+
+        metadata = self.read_metadata()
+        legacy_filename = self.existing_filename()
+        if legacy_filename is not None or (metadata.get('complete') and metadata.get('all_resources')) or \
+                (len(chain) == 0 and os.path.exists(self.descriptor_filename)):
             print('using checkpoint data from {}'.format(self.checkpoint_path))
-            return unstream(self.filename),
+            if os.path.exists(self.metadata_filename):
+                # Mark as recently used
+                os.utime(self.metadata_filename)
+            self.evict()
+            if legacy_filename is not None:
+                return unstream(legacy_filename),
+            return self.restore(),
+
+        if metadata:
+            print('resuming checkpoint at: {}'.format(self.checkpoint_path))
         else:
             print('saving checkpoint to: {}'.format(self.checkpoint_path))
-            return itertools.chain(self.chain, (stream(self.filename),
-                                                _notify_checkpoint_saved(self.checkpoint_name)))
+            os.makedirs(self.checkpoint_path, exist_ok=True)
+            self.write_metadata(fingerprint=self.current_fingerprint, created=time.time(),
+                                format=self.format, complete=False)
+        return itertools.chain(chain, (self.saver(),
+                                       _notify_checkpoint_saved(self.checkpoint_name)))
 
     def handle_flow_checkpoint(self, parent_chain):
-        self.chain = itertools.chain(self.chain, parent_chain)
+        self.chain = list(itertools.chain(self.steps, parent_chain))
         return [self]
@@ -1,31 +1,95 @@
-from dataflows import PackageWrapper, ResourceWrapper
-
+from .. import DataStreamProcessor, ResourceWrapper
 from ..helpers.resource_matcher import ResourceMatcher
+from .aggregate import Partition, NUM_PARTITIONS
+
+
+def deduper(rows, pk, on_duplicate):
+    keys = set()
+    for row in rows:
+        key = tuple(row[k] for k in pk)
+        if key in keys:
+            on_duplicate()
+            continue
+        keys.add(key)
+        yield row
+
+
+def sorted_deduper(rows, pk, on_duplicate):
+    last_key = None
+    for row in rows:
+        key = tuple(row[k] for k in pk)
+        if key == last_key:
+            on_duplicate()
+            continue
+        last_key = key
+        yield row
+
+
+def spilling_deduper(rows, pk, on_duplicate, max_keys, depth=0):
+    keys = set()
+    partitions = None
+    for row in rows:
+        key = tuple(row[k] for k in pk)
+        if key in keys:
+            on_duplicate()
+            continue
+        if len(keys) >= max_keys:
+            # Rows with keys we haven't seen yet are handled later, partition by partition
+            if partitions is None:
+                partitions = [Partition() for _ in range(NUM_PARTITIONS)]
+            partitions[hash((depth, key)) % NUM_PARTITIONS].write(row)
+            continue
+        keys.add(key)
+        yield row
+    keys.clear()
+
+    if partitions is not None:
+        for partition in partitions:
+            if partition.count > 0:
+                yield from spilling_deduper(partition, pk, on_duplicate, max_keys, depth + 1)
 
 
-def deduper(rows: ResourceWrapper):
-    pk = rows.res.descriptor['schema'].get('primaryKey', [])
-    if len(pk) == 0:
-        yield from rows
-    else:
-        keys = set()
-        for row in rows:
-            key = tuple(row[k] for k in pk)
-            if key in keys:
-                continue
-            keys.add(key)
-            yield row
-
-
-def deduplicate(resources=None):
-
-    def func(package: PackageWrapper):
-        resource_matcher = ResourceMatcher(resources, package)
-        yield package.pkg
-        resource: ResourceWrapper
-        for resource in package:
-            if resource_matcher.match(resource.res.name):
-                yield deduper(resource)
+def bloom_deduper(rows, pk, on_duplicate, error_rate):
+    from pybloom_live import ScalableBloomFilter
+
+    keys = ScalableBloomFilter(error_rate=error_rate, mode=ScalableBloomFilter.LARGE_SET_GROWTH)
+    for row in rows:
+        key = tuple(row[k] for k in pk)
+        if keys.add(key):
+            on_duplicate()
+            continue
+        yield row
+
+
+class deduplicate(DataStreamProcessor):
+
+    def __init__(self, resources=None, sorted_input=False, max_keys=None, error_rate=None):
+        super(deduplicate, self).__init__()
+        self.resources = resources
+        self.sorted_input = sorted_input
+        self.max_keys = max_keys
+        self.error_rate = error_rate
+
+    def on_duplicate(self):
+        self.stats['duplicates_dropped'] += 1
+
+    def process_resources(self, resources):
+        res: ResourceWrapper
+        for res in resources:
+            pk = res.res.descriptor['schema'].get('primaryKey', [])
+            if not self.matcher.match(res.res.name) or len(pk) == 0:
+                yield res
+            elif self.sorted_input:
+                yield sorted_deduper(res, pk, self.on_duplicate)
+            elif self.error_rate is not None:
+                yield bloom_deduper(res, pk, self.on_duplicate, self.error_rate)
+            elif self.max_keys is not None:
+                yield spilling_deduper(res, pk, self.on_duplicate, self.max_keys)
             else:
-                yield resource
-    return func
+                yield deduper(res, pk, self.on_duplicate)
+
+    def process_datapackage(self, dp):
+        dp = super(deduplicate, self).process_datapackage(dp)
+        self.matcher = ResourceMatcher(self.resources, dp)
+        self.stats['duplicates_dropped'] = 0
+        return dp
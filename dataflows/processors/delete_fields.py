@@ -48,4 +48,6 @@ def delete_fields(fields, resources=None, regex=True):
             else:
                 yield process_resource(resource, new_field_names[resource.res.name])
 
+    # Lets a preceding load skip reading these fields
+    func.pushdown = dict(delete=fields, resources=resources, regex=regex)
     return func
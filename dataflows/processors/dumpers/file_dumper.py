@@ -1,4 +1,7 @@
 import os
+import io
+import bz2
+import gzip
 import json
 import tempfile
 import hashlib
@@ -8,7 +11,7 @@ from dataflows.base.resource_wrapper import ResourceWrapper
 from datapackage import Resource
 
 from .dumper_base import DumperBase
-from .formats import CSVFormat, JSONFormat, GeoJSONFormat, ExcelFormat, FileFormat
+from .formats import CSVFormat, JSONFormat, GeoJSONFormat, ExcelFormat, ParquetFormat, FileFormat
 
 
 # see https://stackoverflow.com/questions/7150826/how-can-i-get-the-default-file-permissions-in-python
@@ -25,6 +28,83 @@ def UmaskNamedTemporaryFile(*args, **kargs):
     return fdesc
 
 
+def open_gzip(file):
+    # No file name or modification time in the header, so the same rows always give the same hash
+    return gzip.GzipFile(filename='', mode='wb', fileobj=file, compresslevel=6, mtime=0)
+
+
+def open_bz2(file):
+    return bz2.BZ2File(file, mode='wb')
+
+
+def open_zstd(file):
+    import zstandard
+    return io.BufferedWriter(zstandard.ZstdCompressor().stream_writer(file))
+
+
+# compression -> (value of the resource's `compression` property and path extension, opener)
+COMPRESSIONS = {
+    'gzip': ('gz', open_gzip),
+    'bz2': ('bz2', open_bz2),
+    'zstd': ('zst', open_zstd),
+}
+
+
+class CountingWriter(io.RawIOBase):
+    """Writes to a file, counting (and optionally hashing) the bytes written to it"""
+
+    def __init__(self, file, hasher=None):
+        self.file = file
+        self.name = file.name
+        self.hasher = hasher
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.file.write(data)
+        if self.hasher is not None:
+            self.hasher.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.size
+
+    def flush(self):
+        self.file.flush()
+
+
+class OutputFile(object):
+    """Temporary file of a dumped resource, which is compressed, measured and hashed while it's written"""
+
+    def __init__(self, mode, compression=None, hash=False):
+        self.temp_file = UmaskNamedTemporaryFile(mode='wb', delete=False)
+        self.name = self.temp_file.name
+        self.counter = CountingWriter(self.temp_file, hashlib.md5() if hash else None)
+        if compression is not None:
+            stream = COMPRESSIONS[compression][1](self.counter)
+        else:
+            stream = io.BufferedWriter(self.counter)
+        if 'b' not in mode:
+            stream = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+        self.file = stream
+
+    def close(self):
+        # Flushes buffers and compression trailers through the counter
+        self.file.close()
+        self.temp_file.close()
+        self.size = self.counter.size
+        self.hasher = self.counter.hasher
+        if os.path.getsize(self.name) != self.size:
+            # Formats which save the file by its name (e.g. excel) don't write through the counter
+            self.size = os.path.getsize(self.name)
+            if self.hasher is not None:
+                with open(self.name, 'rb') as f:
+                    self.hasher = FileDumper.hash_handler(f)
+
+
 class FileDumper(DumperBase):
 
     def __init__(self, options: dict):
@@ -35,6 +115,10 @@ class FileDumper(DumperBase):
         self.use_titles = options.pop('use_titles', False)
         self.writer_options = options.pop('options', dict())
         self.custom_formatters = options.pop('file_formatters', dict())
+        # Named apart from the `compression` option of the Parquet writer, which compresses columns inside the file
+        self.file_compression = options.pop('file_compression', None)
+        assert self.file_compression is None or self.file_compression in COMPRESSIONS, \
+            'Unknown file compression {!r}'.format(self.file_compression)
 
     def process_datapackage(self, datapackage):
         datapackage = \
@@ -56,10 +140,17 @@ class FileDumper(DumperBase):
                 'geojson': GeoJSONFormat,
                 'excel': ExcelFormat,
                 'xlsx': ExcelFormat,
+                'parquet': ParquetFormat,
             }.get(file_format)
             if file_formatter is not None:
                 self.file_formatters[resource.name] = file_formatter
                 self.file_formatters[resource.name].prepare_resource(resource)
+                if self.file_compression is not None:
+                    assert 'b' not in file_formatter.FILE_MODE, \
+                        'File compression is not supported for the binary {} format'.format(file_format)
+                    extension, _ = COMPRESSIONS[self.file_compression]
+                    resource.descriptor['path'] += '.' + extension
+                    resource.descriptor['compression'] = extension
                 resource.commit()
                 datapackage.descriptor['resources'][i] = resource.descriptor
 
@@ -87,17 +178,18 @@ class FileDumper(DumperBase):
         self.write_file_to_output(temp_file_name, 'datapackage.json')
         # if location is not None:
         #     stats.setdefault(STATS_DPP_KEY, {})[STATS_OUT_DP_URL_KEY] = location
-        os.unlink(temp_file_name)
+        FileDumper.remove_file(temp_file_name)
         super(FileDumper, self).handle_datapackage()
 
     def write_file_to_output(self, filename, path):
         raise NotImplementedError()
 
-    def rows_processor(self, resource, writer, temp_file):
+    def rows_processor(self, resource, writer, output_file):
         for row in resource:
             writer.write_row(row)
             yield row
         writer.finalize_file()
+        output_file.close()
 
         # Get resource descriptor
         resource_descriptor = resource.res.descriptor
@@ -106,23 +198,21 @@ class FileDumper(DumperBase):
                 resource_descriptor = descriptor
 
         # File size:
-        filesize = temp_file.tell()
+        filesize = output_file.size
         DumperBase.inc_attr(self.datapackage.descriptor, self.datapackage_bytes, filesize)
         DumperBase.inc_attr(resource_descriptor, self.resource_bytes, filesize)
 
         # File Hash:
         if self.resource_hash:
-            hasher = FileDumper.hash_handler(temp_file)
+            hasher = output_file.hasher
             # Update path with hash
             if self.add_filehash_to_path:
                 DumperBase.insert_hash_in_path(resource_descriptor, hasher.hexdigest())
             DumperBase.set_attr(resource_descriptor, self.resource_hash, hasher.hexdigest())
 
         # Finalise
-        filename = temp_file.name
-        temp_file.close()
-        self.write_file_to_output(filename, resource.res.source)
-        os.unlink(filename)
+        self.write_file_to_output(output_file.name, resource.res.source)
+        FileDumper.remove_file(output_file.name)
 
     def process_resource(self, resource: ResourceWrapper):
         if resource.res.name in self.file_formatters:
@@ -130,23 +220,27 @@ class FileDumper(DumperBase):
 
             file_formatter = self.file_formatters[resource.res.name]
 
-            temp_file = UmaskNamedTemporaryFile(
-                mode=file_formatter.FILE_MODE, delete=False,
-                newline='' if 'b' not in file_formatter.FILE_MODE else None
-            )
+            # Rows are written (and compressed) through the counter, so the file isn't read again for its hash
+            output_file = OutputFile(file_formatter.FILE_MODE, self.file_compression, hash=bool(self.resource_hash))
             writer_kwargs = self.writer_options
             if self.use_titles:
                 writer_kwargs['use_titles'] = True
             writer_kwargs['temporal_format_property'] = self.temporal_format_property
             writer_kwargs['resource'] = resource.res
-            writer = file_formatter(temp_file, schema, **writer_kwargs)
+            writer = file_formatter(output_file.file, schema, **writer_kwargs)
 
             return self.rows_processor(resource,
                                        writer,
-                                       temp_file)
+                                       output_file)
         else:
             return resource
 
+    @staticmethod
+    def remove_file(filename):
+        # Outputs may move the file instead of copying it
+        if os.path.exists(filename):
+            os.unlink(filename)
+
     @staticmethod
     def hash_handler(tfile):
         tfile.seek(0)
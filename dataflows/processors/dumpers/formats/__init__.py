@@ -3,3 +3,4 @@ from .format_csv import CSVFormat
 from .format_json import JSONFormat
 from .format_geojson import GeoJSONFormat
 from .format_excel import ExcelFormat
+from .format_parquet import ParquetFormat
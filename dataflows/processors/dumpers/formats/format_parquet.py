@@ -0,0 +1,108 @@
+import json
+import isodate
+from pathlib import Path
+
+from dataflows.helpers.arrow import arrow_types, number_field, number_array
+
+from .base import FileFormat, identity, json_dumps
+
+
+class ParquetFormat(FileFormat):
+    """Writes rows into a Parquet file, with a typed column for each field of the schema
+
+    Rows are buffered by column, and written as a row group once `row_group_size` rows were buffered.
+    Values of types without an equivalent Parquet type (e.g. `object` or `geopoint`) are written as strings,
+    the same way the CSV format writes them. Numbers are written as decimals, with the scale of the first row group and
+    the maximal precision (38 digits). If they don't fit, they're written as strings (with metadata for reading them
+    back as numbers), and numbers of later row groups which don't fit raise an error rather than being rounded.
+    With `float_numbers`, numbers are written as doubles instead, which may lose precision.
+    """
+
+    SERIALIZERS = {
+        'string': identity,
+        'integer': identity,
+        'number': identity,
+        'boolean': identity,
+        'date': identity,
+        'time': identity,
+        'datetime': identity,
+        'year': identity,
+        'array': json_dumps,
+        'object': json_dumps,
+        'duration': lambda d: isodate.duration_isoformat(d),
+        'geopoint': lambda d: '{}, {}'.format(*d),
+        'geojson': json.dumps,
+        'yearmonth': lambda d: '{:04d}-{:02d}'.format(*d),
+    }
+    NULL_VALUE = None
+    FILE_MODE = 'wb+'
+
+    DEFAULT_ROW_GROUP_SIZE = 64 * 1024
+    DEFAULT_COMPRESSION = 'snappy'
+
+    def __init__(self, file, schema, use_titles=False, row_group_size=None, compression=None, float_numbers=False,
+                 **options):
+        super(ParquetFormat, self).__init__(None, schema, **options)
+        self.file = file
+        self.compression = compression or self.DEFAULT_COMPRESSION
+        self.float_numbers = float_numbers
+        self.row_group_size = row_group_size or self.DEFAULT_ROW_GROUP_SIZE
+        self.arrow_schema = None
+        self.columns = dict((name, []) for name in self.headers)
+        self.buffered = 0
+
+    def open_writer(self):
+        # The writer is opened with the first row group, as the types of numbers are inferred from its values
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        types = arrow_types()
+        arrow_fields = []
+        for name in self.headers:
+            field = self.fields[name]
+            if field.type == 'number':
+                arrow_fields.append(number_field(name, self.columns[name], self.float_numbers, headroom=True))
+            elif field.descriptor['serializer'] is not self.SERIALIZERS.get(field.type):
+                # Temporal values formatted with the `temporal_format_property` are strings
+                arrow_fields.append(pa.field(name, pa.string()))
+            else:
+                arrow_fields.append(pa.field(name, types.get(field.type, pa.string())))
+        self.arrow_schema = pa.schema(arrow_fields)
+        self.writer = pq.ParquetWriter(self.file, self.arrow_schema, compression=self.compression)
+
+    @classmethod
+    def prepare_resource(cls, resource):
+        descriptor = resource.descriptor
+        descriptor['path'] = str(Path(descriptor['path']).with_suffix('.parquet'))
+        descriptor['format'] = 'parquet'
+        descriptor['mediatype'] = 'application/vnd.apache.parquet'
+        descriptor.pop('encoding', None)
+        super(ParquetFormat, cls).prepare_resource(resource)
+
+    def write_transformed_row(self, transformed_row):
+        for name, column in self.columns.items():
+            column.append(transformed_row.get(name))
+        self.buffered += 1
+        if self.buffered >= self.row_group_size:
+            self.write_row_group()
+
+    def write_row_group(self):
+        import pyarrow as pa
+        if self.arrow_schema is None:
+            self.open_writer()
+        if self.buffered > 0:
+            batch = pa.RecordBatch.from_arrays(
+                [
+                    number_array(self.columns[f.name], f.type) if self.fields[f.name].type == 'number'
+                    else pa.array(self.columns[f.name], type=f.type)
+                    for f in self.arrow_schema
+                ],
+                schema=self.arrow_schema
+            )
+            self.writer.write_batch(batch, row_group_size=self.row_group_size)
+            for column in self.columns.values():
+                column.clear()
+            self.buffered = 0
+
+    def finalize_file(self):
+        self.write_row_group()
+        self.writer.close()
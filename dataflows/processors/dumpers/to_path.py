@@ -18,7 +18,8 @@ class PathDumper(FileDumper):
             return
         path_part = os.path.dirname(path)
         PathDumper.__makedirs(path_part)
-        shutil.copy(filename, path)
+        # The temporary file isn't used after it's written to the output
+        shutil.move(filename, path)
         return path
 
     @staticmethod
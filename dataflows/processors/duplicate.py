@@ -1,22 +1,55 @@
 import copy
-from kvfile import KVFile
+import pickle
+import tempfile
+import collections
 
 
-def saver(resource, db, batch_size):
-    gen = db.insert_generator(
-        (('{:08x}'.format(idx), row)
-         for idx, row
-         in enumerate(resource)),
-        batch_size=batch_size
-    )
-    for _, row in gen:
-        yield row
+# Keeps rows in memory, spilling them to an append-only file when there are too many
+class RowBuffer(object):
+
+    def __init__(self, max_rows, batch_size):
+        self.max_rows = max_rows
+        self.batch_size = max(batch_size, 1)
+        self.rows = collections.deque()
+        self.batch = []
+        self.file = None
+        self.batches = 0
+
+    def append(self, row):
+        # Rows might get modified downstream, so we keep a copy
+        row = dict(
+            (k, copy.deepcopy(v) if isinstance(v, (list, dict, set)) else v)
+            for k, v in row.items()
+        )
+        if self.file is None and len(self.rows) < self.max_rows:
+            self.rows.append(row)
+        else:
+            self.batch.append(row)
+            if len(self.batch) >= self.batch_size:
+                self.flush()
 
+    def flush(self):
+        if self.file is None:
+            self.file = tempfile.TemporaryFile()
+        pickle.dump(self.batch, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.batch = []
+        self.batches += 1
 
-def loader(db):
-    for _, value in db.items():
-        yield value
-    db.close()
+    def __iter__(self):
+        while self.rows:
+            yield self.rows.popleft()
+        if self.file is not None:
+            self.file.seek(0)
+            for _ in range(self.batches):
+                yield from pickle.load(self.file)
+            self.file.close()
+        yield from self.batch
+
+
+def saver(resource, buffer):
+    for row in resource:
+        buffer.append(row)
+        yield row
 
 
 def duplicate(
@@ -25,6 +58,7 @@ def duplicate(
     target_path=None,
     batch_size=1000,
     duplicate_to_end=False,
+    max_buffered_rows=10000,
 ):
     def func(package):
         source_, target_name_, target_path_ = source, target_name, target_path
@@ -54,18 +88,18 @@ def duplicate(
         descriptor['resources'] = list(traverse_resources(descriptor['resources']))
         yield package.pkg
 
-        dbs = []
+        buffers = []
         for resource in package:
             if resource.res.name == source_:
-                db = KVFile()
-                yield saver(resource, db, batch_size)
+                buffer = RowBuffer(max_buffered_rows, batch_size)
+                yield saver(resource, buffer)
                 if duplicate_to_end:
-                    dbs.append(db)
+                    buffers.append(buffer)
                 else:
-                    yield loader(db)
+                    yield iter(buffer)
             else:
                 yield resource
-        for db in dbs:
-            yield loader(db)
+        for buffer in buffers:
+            yield iter(buffer)
 
     return func
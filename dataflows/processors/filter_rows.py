@@ -23,8 +23,10 @@ def process_resource(rows, condition):
 
 def filter_rows(condition=None, equals=tuple(), not_equals=tuple(), resources=None):
 
+    pushdown = None
     if not condition:
         condition = old_style_conditions(equals, not_equals)
+        pushdown = dict(equals=list(equals), not_equals=list(not_equals), resources=resources)
 
     def func(package):
         matcher = ResourceMatcher(resources, package.pkg)
@@ -35,4 +37,7 @@ def filter_rows(condition=None, equals=tuple(), not_equals=tuple(), resources=No
             else:
                 yield r
 
+    if pushdown is not None:
+        # Lets a preceding load discard rows early (custom conditions are opaque, so are not pushed down)
+        func.pushdown = pushdown
     return func
@@ -1,6 +1,10 @@
 import re
 import copy
 import os
+import json
+import shutil
+import hashlib
+import logging
 import warnings
 import collections
 
@@ -25,6 +29,71 @@ class KeyCalc(object):
         return self.key_spec.format(**{**row, '#': row_number})
 
 
+# Persistent index helpers
+class JoinIndex(object):
+
+    FINGERPRINT_FILE = 'fingerprint.json'
+    ACTIVE_SUFFIX = '.active'
+
+    def __init__(self, path):
+        self.path = path
+        self.db = None
+        self.reused = False
+
+    @staticmethod
+    def fingerprint(source_spec, source_key, fields, mode, extra):
+        # The schema and join parameters don't tell whether the rows changed, so without a content signal
+        # (the `hash` or `bytes` and `count_of_rows` of a dumped resource, or `index_fingerprint`) there's no fingerprint
+        has_content = source_spec.get('hash') is not None or \
+            (source_spec.get('bytes') is not None and source_spec.get('count_of_rows') is not None)
+        if not has_content and extra is None:
+            return None
+        source_spec = dict(
+            (k, source_spec.get(k))
+            for k in ('schema', 'hash', 'bytes', 'count_of_rows')
+        )
+        content = dict(source=source_spec, key=source_key.key_spec,
+                       fields=fields, mode=mode, extra=extra)
+        content = json.dumps(content, sort_keys=True, ensure_ascii=True, default=str)
+        return hashlib.md5(content.encode('ascii')).hexdigest()
+
+    def current_fingerprint(self):
+        try:
+            with open(os.path.join(self.path, self.FINGERPRINT_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def open(self, fingerprint):
+        self.fingerprint_ = fingerprint
+        if fingerprint is not None and self.current_fingerprint() == fingerprint:
+            logging.info('Reusing join index from %s', self.path)
+            self.reused = True
+            self.db = KVFile(location=os.path.join(self.path, 'index'))
+        else:
+            logging.info('Building join index in %s', self.path)
+            building = self.path + self.ACTIVE_SUFFIX
+            shutil.rmtree(building, ignore_errors=True)
+            os.makedirs(building)
+            self.db = KVFile(location=os.path.join(building, 'index'))
+        return self.db
+
+    def commit(self):
+        if self.reused:
+            return self.db
+        self.db.close()
+        building = self.path + self.ACTIVE_SUFFIX
+        if self.fingerprint_ is not None:
+            # An index without a fingerprint is never reused
+            with open(os.path.join(building, self.FINGERPRINT_FILE), 'w') as f:
+                json.dump(self.fingerprint_, f)
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.rename(building, self.path)
+        self.reused = True
+        self.db = KVFile(location=os.path.join(self.path, 'index'))
+        return self.db
+
+
 # Aggregator helpers
 def identity(x):
     return x
@@ -172,17 +241,17 @@ def concatenator(resources, all_target_fields, field_mapping):
 
 
 def join_aux(source_name, source_key, source_delete,  # noqa: C901
-             target_name, target_key, fields, full, mode):
+             target_name, target_key, fields, full, mode,
+             index_path=None, index_fingerprint=None):
 
     deduplication = target_key is None
     fields = fix_fields(fields)
     source_key = KeyCalc(source_key)
     target_key = KeyCalc(target_key) if target_key is not None else target_key
-    # We will store db keys as boolean flags:
-    # - False -> inserted/not used
-    # - True -> inserted/used
+    # We only store the keys used by the target, unused ones are found by scanning the index
     db_keys_usage = KVFile()
-    db = KVFile()
+    db = None
+    index = JoinIndex(index_path) if index_path is not None and not deduplication else None
 
     # Mode of join operation
     if full is not None:
@@ -195,6 +264,7 @@ def join_aux(source_name, source_key, source_delete,  # noqa: C901
 
     # Indexes the source data
     def indexer(resource):
+        nonlocal db
         for row_number, row in enumerate(resource, start=1):
             key = source_key(row, row_number)
             try:
@@ -216,8 +286,9 @@ def join_aux(source_name, source_key, source_delete,  # noqa: C901
             if mode == 'full-outer':
                 current['__key__'] = [row.get(field) for field in source_key.key_list]
             db.set(key, current)
-            db_keys_usage.set(key, False)
             yield row
+        if index is not None:
+            db = index.commit()
 
     # Generates the joined data
     def process_target(resource):
@@ -238,7 +309,8 @@ def join_aux(source_name, source_key, source_delete,  # noqa: C901
                 key = target_key(row, row_number)
                 try:
                     extra = create_extra_by_key(key)
-                    db_keys_usage.set(key, True)
+                    if mode == 'full-outer':
+                        db_keys_usage.set(key, True)
                 except KeyError:
                     if mode == 'inner':
                         continue
@@ -249,8 +321,8 @@ def join_aux(source_name, source_key, source_delete,  # noqa: C901
                 row.update(extra)
                 yield row
             if mode == 'full-outer':
-                for key, value in db_keys_usage.items():
-                    if value is False:
+                for key in db.keys():
+                    if db_keys_usage.get(key, default=None) is None:
                         extra = create_extra_by_key(key)
                         yield extra
 
@@ -275,7 +347,11 @@ def join_aux(source_name, source_key, source_delete,  # noqa: C901
             name = resource.res.name
             if name == source_name:
                 has_index = True
-                if source_delete:
+                if index is not None and index.reused:
+                    # index is up to date, no need to read the source
+                    if not source_delete:
+                        yield resource
+                elif source_delete:
                     # just empty the iterable
                     collections.deque(indexer(resource), maxlen=0)
                 else:
@@ -366,9 +442,15 @@ def join_aux(source_name, source_key, source_delete,  # noqa: C901
                 new_resources.append(resource)
 
         datapackage['resources'] = new_resources
+        return source_spec
 
     def func(package: PackageWrapper):
-        process_datapackage(package.pkg.descriptor)
+        nonlocal db
+        source_spec = process_datapackage(package.pkg.descriptor)
+        if index is not None:
+            db = index.open(JoinIndex.fingerprint(source_spec, source_key, fields, mode, index_fingerprint))
+        else:
+            db = KVFile()
         yield package.pkg
         yield from new_resource_iterator(package)
         db.close()
@@ -377,8 +459,10 @@ def join_aux(source_name, source_key, source_delete,  # noqa: C901
     return func
 
 
-def join(source_name, source_key, target_name, target_key, fields={}, full=None, mode='half-outer', source_delete=True):
-    return join_aux(source_name, source_key, source_delete, target_name, target_key, fields, full, mode)
+def join(source_name, source_key, target_name, target_key, fields={}, full=None, mode='half-outer', source_delete=True,
+         index_path=None, index_fingerprint=None):
+    return join_aux(source_name, source_key, source_delete, target_name, target_key, fields, full, mode,
+                    index_path=index_path, index_fingerprint=index_fingerprint)
 
 
 def join_with_self(resource_name, join_key, fields):
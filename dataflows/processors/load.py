@@ -1,16 +1,28 @@
 import os
+import re
+import copy
+import glob
+import json
+import hashlib
 import warnings
 import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 from datapackage import Package
-from tabulator import Stream
+from tabulator import Stream, config
+from tabulator.helpers import detect_scheme_and_format
 from tableschema.schema import Schema
+from tableschema.exceptions import CastError
 from .. import DataStreamProcessor
 from ..base.exceptions import SourceLoadError
 from ..base.schema_validator import schema_validator, ignore, drop, raise_exception, clear
 from ..helpers.resource_matcher import ResourceMatcher
+from ..helpers.csv_stream import CSVStream
+from ..helpers.ndjson_stream import NDJSONStream
+from ..helpers.parquet_stream import ParquetStream
+from .filter_rows import old_style_conditions
 
-from .parsers import XMLParser, ExcelXMLParser, ExtendedSQLParser, GeoJsonParser
+from .parsers import XMLParser, ExcelXMLParser, ExtendedSQLParser, GeoJsonParser, XLSXParser
 
 
 class StringsGuesser():
@@ -37,6 +49,111 @@ class TypesGuesser():
         return ret
 
 
+def is_glob(source):
+    # Existing files are loaded as is, even if their names contain glob characters (e.g. `data[2020].csv`)
+    return isinstance(source, str) and '://' not in source and any(c in source for c in '*?[') and \
+        not os.path.exists(source)
+
+
+def open_stream(source, options, deduplicate_headers, case_sensitive, deduplicate_format, workers=None):
+    if CSVStream.supports(source, options):
+        # Local CSV files are read without tabulator's per-row overhead
+        stream = CSVStream(source, workers=workers, **options).open()
+    elif NDJSONStream.supports(source, options):
+        stream = NDJSONStream(source, workers=workers, **options).open()
+    elif ParquetStream.supports(source, options):
+        stream = ParquetStream(source, workers=workers, **options).open()
+    else:
+        stream: Stream = Stream(source, **options).open()
+    if case_sensitive:
+        duplication_test = len(stream.headers) != len(set(stream.headers))
+    else:
+        lower_headers = [header.lower() for header in stream.headers]
+        duplication_test = len(lower_headers) != len(set(lower_headers))
+    if duplication_test:
+        if not deduplicate_headers:
+            raise ValueError(
+                'Found duplicate headers.' +
+                'Use the `deduplicate_headers` flag (found headers=%r)' % stream.headers)
+        stream.headers = load.rename_duplicate_headers(
+            stream.headers, case_sensitive=case_sensitive,
+            deduplicate_format=deduplicate_format
+        )
+    return stream
+
+
+def detect_format(source):
+    if not isinstance(source, str):
+        return None
+    _, source_format = detect_scheme_and_format(source)
+    if source_format in config.SUPPORTED_COMPRESSION or source_format in CSVStream.COMPRESSIONS:
+        # The format of compressed files is detected when they're opened
+        return None
+    return source_format
+
+
+def resource_rows(resource):
+    # Datapackage resources are also opened only when their rows are needed
+    if resource.local and resource.descriptor.get('format') in ParquetStream.FORMATS \
+            and ParquetStream.supports(resource.source, {}):
+        # Parquet files (e.g. dumped by dump_to_path) aren't supported by tabulator, so they're read and cast here
+        stream = ParquetStream(resource.source).open()
+        try:
+            yield from schema_validator(resource, stream.iter(keyed=True))
+        finally:
+            stream.close()
+        return
+    yield from resource.iter(keyed=True, cast=True)
+
+
+def read_rows(source, options, header_options):
+    stream = open_stream(source, options, *header_options)
+    try:
+        return list(stream.iter(keyed=True))
+    finally:
+        stream.close()
+
+
+class ParallelFileReader(object):
+    """Reads whole files in a pool of workers, up to `workers` files ahead of the file being consumed"""
+
+    def __init__(self, filenames, options, header_options, workers, use_processes=False):
+        self.filenames = filenames
+        self.options = options
+        self.header_options = header_options
+        self.workers = workers
+        self.use_processes = use_processes
+        self.executor = None
+        self.futures = {}
+        self.submitted = 0
+
+    def result(self, index):
+        if self.executor is None:
+            executor_cls = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            self.executor = executor_cls(max_workers=self.workers)
+        # Files which were not consumed are discarded
+        for skipped in [i for i in self.futures if i < index]:
+            self.futures.pop(skipped).cancel()
+        self.submitted = max(self.submitted, index)
+        while self.submitted < min(len(self.filenames), index + 1 + self.workers):
+            self.futures[self.submitted] = self.executor.submit(
+                read_rows, self.filenames[self.submitted], self.options, self.header_options
+            )
+            self.submitted += 1
+        try:
+            return self.futures.pop(index).result()
+        finally:
+            if len(self.futures) == 0 and self.submitted == len(self.filenames):
+                self.executor.shutdown()
+
+    def rows(self, index):
+        yield from self.result(index)
+
+    def all_rows(self):
+        for index in range(len(self.filenames)):
+            yield from self.result(index)
+
+
 class load(DataStreamProcessor):
 
     INFER_STRINGS = 'strings'
@@ -52,6 +169,14 @@ class load(DataStreamProcessor):
     ERRORS_RAISE = raise_exception
     ERRORS_CLEAR = clear
 
+    # Loading multiple files
+    SAMPLE_FILES = 10
+    MAX_WORKERS = 8
+
+    # Caching inferred schemas
+    DEFAULT_SCHEMA_CACHE = '.cache/schemas'
+    SCHEMA_CACHE_HASH_SIZE = 1024 * 1024
+
     def __init__(self, load_source, name=None, resources=None, strip=True, limit_rows=None,
                  infer_strategy=None, cast_strategy=None,
                  override_schema=None, override_fields=None,
@@ -60,6 +185,8 @@ class load(DataStreamProcessor):
                  deduplicate_headers_case_sensitive=True,
                  deduplicate_headers_format=' (%s)',
                  on_error=raise_exception,
+                 concatenate_files=True, workers=None, use_processes=False,
+                 schema_cache=None,
                  **options):
         super(load, self).__init__()
         self.load_source = load_source
@@ -74,6 +201,10 @@ class load(DataStreamProcessor):
         self.deduplicate_headers = deduplicate_headers
         self.deduplicate_headers_case_sensitive = deduplicate_headers_case_sensitive
         self.deduplicate_headers_format = deduplicate_headers_format
+        self.concatenate_files = concatenate_files
+        self.workers = workers
+        self.use_processes = use_processes
+        self.schema_cache = schema_cache
 
         # Extract missing values
         self.extract_missing_values = None
@@ -91,6 +222,12 @@ class load(DataStreamProcessor):
         self.resource_descriptors = []
         self.iterators = []
 
+        # Set by the flow, from the steps following this one
+        self.pushdown_steps = []
+        self.projections = {}
+        self.predicates = {}
+        self.projected_at_source = set()
+
         if 'force_strings' in options:
             warnings.warn('force_strings is being deprecated, use infer_strategy & cast_strategy instead',
                           DeprecationWarning)
@@ -114,11 +251,12 @@ class load(DataStreamProcessor):
             self.INFER_STRINGS: StringsGuesser,
         }[infer_strategy or self.INFER_FULL]
 
+        self.cast_strategy = cast_strategy or self.CAST_DO_NOTHING
         self.caster = {
             self.CAST_DO_NOTHING: lambda res, it: it,
             self.CAST_WITH_SCHEMA: lambda res, it: schema_validator(res, it, on_error=on_error),
             self.CAST_TO_STRINGS: lambda res, it: self.stringer(it)
-        }[cast_strategy or self.CAST_DO_NOTHING]
+        }[self.cast_strategy]
 
     def process_datapackage(self, dp: Package):
         try:
@@ -134,6 +272,9 @@ class load(DataStreamProcessor):
         custom_parsers.setdefault('excel-xml', ExcelXMLParser)
         custom_parsers.setdefault('sql', ExtendedSQLParser)
         custom_parsers.setdefault('geojson', GeoJsonParser)
+        custom_parsers.setdefault('geojsonl', GeoJsonParser)
+        custom_parsers.setdefault('geojsons', GeoJsonParser)
+        custom_parsers.setdefault('xlsx', XLSXParser)
         return custom_parsers
 
     def safe_process_datapackage(self, dp: Package):
@@ -149,6 +290,10 @@ class load(DataStreamProcessor):
             self.iterators = (resource for resource, descriptor in zip(resource_iterator, resources)
                               if resource_matcher.match(descriptor['name']))
 
+        # If load_source is a list of files or a glob pattern:
+        elif isinstance(self.load_source, list) or is_glob(self.load_source):
+            self.process_multiple_files()
+
         # If load_source is string:
         else:
             # Handle Environment vars if necessary:
@@ -165,7 +310,7 @@ class load(DataStreamProcessor):
                 for resource in self.load_dp.resources:
                     if resource_matcher.match(resource.name):
                         self.resource_descriptors.append(resource.descriptor)
-                        self.iterators.append(resource.iter(keyed=True, cast=True))
+                        self.iterators.append(resource_rows(resource))
 
             # Loading for any other source
             else:
@@ -177,57 +322,263 @@ class load(DataStreamProcessor):
                 descriptor['name'] = self.name or path
                 if 'encoding' in self.options:
                     descriptor['encoding'] = self.options['encoding']
-                self.options['custom_parsers'] = self.get_custom_parsers(self.options.get('custom_parsers'))
-                self.options.setdefault('ignore_blank_headers', True)
-                if 'headers' not in self.options:
-                    self.options.setdefault('skip_rows', [{'type': 'preset', 'value': 'auto'}])
-                self.options.setdefault('headers', 1)
-                self.options.setdefault('sample_size', 1000)
-                stream: Stream = Stream(self.load_source, **self.options).open()
-                if self.deduplicate_headers_case_sensitive:
-                    duplication_test = len(stream.headers) != len(set(stream.headers))
-                else:
-                    lower_headers = [header.lower() for header in stream.headers]
-                    duplication_test = len(lower_headers) != len(set(lower_headers))
-                # duplication_test = len(stream.headers) != len(set(stream.headers))
-                if duplication_test:
-                    if not self.deduplicate_headers:
-                        raise ValueError(
-                            'Found duplicate headers.' +
-                            'Use the `deduplicate_headers` flag (found headers=%r)' % stream.headers)
-                    stream.headers = self.rename_duplicate_headers(
-                        stream.headers, case_sensitive=self.deduplicate_headers_case_sensitive,
-                        deduplicate_format=self.deduplicate_headers_format
-                    )
-                schema = Schema(self.override_schema or {}).infer(
-                    stream.sample, headers=stream.headers,
-                    confidence=1, guesser_cls=self.guesser)
-                # restore schema field names to original headers
-                for header, field in zip(stream.headers, schema['fields']):
-                    field['name'] = header
-                if self.override_schema:
-                    schema.update(self.override_schema)
-                if self.override_fields:
-                    fields = schema.get('fields', [])
-                    for field in fields:
-                        field.update(self.override_fields.get(field['name'], {}))
-                if self.extract_missing_values:
-                    missing_values = schema.get('missingValues', [])
-                    if not self.extract_missing_values['values']:
-                        self.extract_missing_values['values'] = missing_values
-                    schema['fields'].append({
-                        'name': self.extract_missing_values['target'],
-                        'type': 'object',
-                        'format': 'default',
-                        'values': self.extract_missing_values['values'],
-                    })
+                self.set_default_options()
+                schema = self.known_schema()
+                stream_format = self.options.get('format') or detect_format(self.load_source)
+                cache_key = self.schema_cache_key(self.load_source) if schema is None else None
+                cached = self.read_cached_schema(cache_key)
+                if cached is not None:
+                    schema = self.complete_schema(cached['schema'])
+                    stream_format = cached['format']
+                stream = None
+                if schema is None or stream_format is None:
+                    stream: Stream = open_stream(self.load_source, self.options, *self.header_options())
+                    if schema is None:
+                        schema = self.sample_schema(stream.headers, stream.sample)
+                        self.write_cached_schema(cache_key, schema, stream.format)
+                        schema = self.complete_schema(schema)
+                    stream_format = stream.format
+                    if isinstance(self.load_source, str) and os.path.isfile(self.load_source):
+                        # Local files are closed until their rows are needed, and opened again then.
+                        # Other sources (e.g. URLs or databases) are read from the same stream, rather than twice
+                        stream.close()
+                        stream = None
                 descriptor['schema'] = schema
-                descriptor['format'] = self.options.get('format', stream.format)
-                descriptor['path'] += '.{}'.format(stream.format)
-                self.iterators.append(stream.iter(keyed=True))
+                descriptor['format'] = self.options.get('format', stream_format)
+                descriptor['path'] += '.{}'.format(stream_format)
+                self.iterators.append(self.stream_rows(self.load_source, descriptor['name'], stream_format, stream))
+                self.projected_at_source.add(descriptor['name'])
         dp.descriptor.setdefault('resources', []).extend(self.resource_descriptors)
+        self.plan_pushdown(dp)
         return dp
 
+    def stream_rows(self, source, name=None, stream_format=None, stream=None):
+        fields = self.projections.get(name)
+        options = self.options
+        if stream_format == 'sql' and self.sql_pushdown_options(name):
+            # The query is changed by the pushed down steps, so it's run again
+            options = dict(options, **self.sql_pushdown_options(name))
+            if stream is not None:
+                stream.close()
+                stream = None
+        if stream is None:
+            stream = open_stream(source, options, *self.header_options(), workers=self.workers)
+        if isinstance(stream, NDJSONStream) and self.cast_strategy == self.CAST_WITH_SCHEMA:
+            descriptor = next(d for d in self.resource_descriptors if d['name'] == name)
+            stream.cast(descriptor['schema'])
+        if isinstance(stream, ParquetStream) and self.pushed_down_filters(name):
+            # Row groups which can't match are skipped, the rows read are still filtered
+            stream.filter(self.pushed_down_filters(name))
+        try:
+            if fields is None:
+                yield from stream.iter(keyed=True)
+            elif isinstance(stream, (CSVStream, ParquetStream)):
+                stream.select(fields)
+                yield from stream.iter(keyed=True)
+            else:
+                yield from self.projector(stream.iter(keyed=True), fields)
+        finally:
+            stream.close()
+
+    def handle_flow_pushdown(self, steps):
+        self.pushdown_steps = steps
+        return self
+
+    def plan_pushdown(self, dp):
+        # Fields which following steps select or delete are not read, and rows which following filters discard
+        # are dropped before casting. Only the declarative forms of these steps are pushed down.
+        self.projections, self.predicates = {}, {}
+        for descriptor in self.resource_descriptors:
+            name = descriptor['name']
+            schema = descriptor.get('schema', {})
+            field_names = [f['name'] for f in schema.get('fields', [])]
+            kept = list(field_names)
+            filters, condition_fields = [], set()
+            for step in self.pushdown_steps:
+                if not ResourceMatcher(step.get('resources'), dp.descriptor).match(name):
+                    continue
+                if 'select' in step or 'delete' in step:
+                    patterns = [
+                        re.compile('^{}$'.format(f if step['regex'] else re.escape(f)))
+                        for f in step.get('select', step.get('delete'))
+                    ]
+                    matched = [f for f in kept if any(pattern.match(f) for pattern in patterns)]
+                    kept = matched if 'select' in step else [f for f in kept if f not in matched]
+                else:
+                    step_fields = set(k for o in step['equals'] + step['not_equals'] for k in o)
+                    # Filtering before limiting would change which rows are emitted
+                    if self.limit_rows or not step_fields.issubset(kept):
+                        break
+                    filters.append(dict(equals=step['equals'], not_equals=step['not_equals']))
+                    condition_fields.update(step_fields)
+            if filters:
+                self.predicates[name] = filters, sorted(condition_fields)
+            required = set(kept) | condition_fields
+            if len(kept) == 0 or self.extract_missing_values or required.issuperset(field_names):
+                continue
+            # The schema is left as is, as it's updated by the steps which drop these fields
+            self.projections[name] = [f for f in field_names if f in required]
+
+    def sql_pushdown_options(self, name):
+        options = {}
+        if 'table' not in self.options or 'query' in self.options:
+            return options
+        if name in self.projections:
+            options['fields'] = self.projections[name]
+        filters = self.pushed_down_filters(name)
+        if filters:
+            options['filters'] = filters
+        return options
+
+    def pushed_down_filters(self, name):
+        if name not in self.predicates:
+            return None
+        filters, _ = self.predicates[name]
+        values = [v for f in filters for o in f['equals'] + f['not_equals'] for v in o.values()]
+        # Values are compared at the source as they are, before being cast or stripped
+        if self.cast_strategy == self.CAST_DO_NOTHING and not (self.strip and any(isinstance(v, str) for v in values)):
+            return filters
+        return None
+
+    def set_default_options(self):
+        self.options['custom_parsers'] = self.get_custom_parsers(self.options.get('custom_parsers'))
+        self.options.setdefault('ignore_blank_headers', True)
+        if 'headers' not in self.options:
+            self.options.setdefault('skip_rows', [{'type': 'preset', 'value': 'auto'}])
+        self.options.setdefault('headers', 1)
+        self.options.setdefault('sample_size', 1000)
+
+    def header_options(self):
+        return self.deduplicate_headers, self.deduplicate_headers_case_sensitive, self.deduplicate_headers_format
+
+    def known_schema(self):
+        # A schema which fully specifies the fields doesn't require sampling the source
+        if self.override_schema and 'fields' in self.override_schema:
+            return self.complete_schema(Schema({}).infer([], headers=[], confidence=1))
+        return None
+
+    def infer_schema(self, headers, sample):
+        return self.complete_schema(self.sample_schema(headers, sample))
+
+    def sample_schema(self, headers, sample):
+        schema = Schema(self.override_schema or {}).infer(
+            sample, headers=headers,
+            confidence=1, guesser_cls=self.guesser)
+        # restore schema field names to original headers
+        for header, field in zip(headers, schema['fields']):
+            field['name'] = header
+        return schema
+
+    def schema_cache_key(self, source):
+        if not self.schema_cache or not isinstance(source, str) or not os.path.isfile(source):
+            return None
+        stat = os.stat(source)
+        if stat.st_size <= self.SCHEMA_CACHE_HASH_SIZE:
+            # Small files are identified by their contents, so touching them doesn't invalidate the cache
+            with open(source, 'rb') as f:
+                version = hashlib.md5(f.read()).hexdigest()
+        else:
+            version = stat.st_mtime_ns
+        key = [
+            os.path.abspath(source), stat.st_size, version,
+            self.options, self.override_schema, self.guesser, self.header_options()
+        ]
+        return hashlib.md5(json.dumps(key, sort_keys=True, default=repr).encode('utf8')).hexdigest()
+
+    def schema_cache_filename(self, cache_key):
+        cache_path = self.DEFAULT_SCHEMA_CACHE if self.schema_cache is True else self.schema_cache
+        return os.path.join(cache_path, cache_key + '.json')
+
+    def read_cached_schema(self, cache_key):
+        if cache_key is None:
+            return None
+        try:
+            with open(self.schema_cache_filename(cache_key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_cached_schema(self, cache_key, schema, stream_format):
+        if cache_key is None:
+            return
+        filename = self.schema_cache_filename(cache_key)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename + '.active', 'w') as f:
+            json.dump(dict(schema=schema, format=stream_format), f)
+        os.replace(filename + '.active', filename)
+
+    def complete_schema(self, schema):
+        if self.override_schema:
+            schema.update(self.override_schema)
+        if self.override_fields:
+            fields = schema.get('fields', [])
+            for field in fields:
+                field.update(self.override_fields.get(field['name'], {}))
+        if self.extract_missing_values:
+            missing_values = schema.get('missingValues', [])
+            if not self.extract_missing_values['values']:
+                self.extract_missing_values['values'] = missing_values
+            schema['fields'].append({
+                'name': self.extract_missing_values['target'],
+                'type': 'object',
+                'format': 'default',
+                'values': self.extract_missing_values['values'],
+            })
+        return schema
+
+    def process_multiple_files(self):
+        sources = self.load_source if isinstance(self.load_source, list) else [self.load_source]
+        filenames = []
+        for source in sources:
+            if is_glob(source):
+                matches = sorted(glob.glob(source, recursive=True))
+                if len(matches) == 0:
+                    raise ValueError('No files found matching {!r}'.format(source))
+                filenames.extend(matches)
+            else:
+                filenames.append(source)
+        assert len(filenames) > 0, 'No files to load'
+        self.set_default_options()
+
+        # The schema is inferred once, from a sample of rows taken across the files
+        sample_files = filenames[::max(1, len(filenames) // self.SAMPLE_FILES)][:self.SAMPLE_FILES]
+        sample_size = max(1, self.options['sample_size'] // len(sample_files))
+        headers, sample, file_format = None, [], None
+        for filename in sample_files:
+            stream = open_stream(filename, self.options, *self.header_options())
+            if headers is None:
+                headers, file_format = stream.headers, stream.format
+            for row in stream.sample[:sample_size]:
+                row = dict(zip(stream.headers, row))
+                sample.append([row.get(header) for header in headers])
+            stream.close()
+        schema = self.infer_schema(headers, sample)
+        file_format = self.options.get('format', file_format)
+
+        workers = self.workers or min(self.MAX_WORKERS, len(filenames))
+        reader = ParallelFileReader(filenames, self.options, self.header_options(), workers, self.use_processes)
+        if self.concatenate_files:
+            name = self.name or os.path.splitext(os.path.basename(filenames[0]))[0]
+            self.resource_descriptors.append(self.file_descriptor(name, file_format, schema))
+            self.iterators.append(reader.all_rows())
+        else:
+            names = set()
+            for index, filename in enumerate(filenames):
+                name = base_name = os.path.splitext(os.path.basename(filename))[0]
+                while name in names:
+                    name = '{}_{}'.format(base_name, len(names))
+                names.add(name)
+                self.resource_descriptors.append(self.file_descriptor(name, file_format, copy.deepcopy(schema)))
+                self.iterators.append(reader.rows(index))
+
+    def file_descriptor(self, name, file_format, schema):
+        descriptor = dict(name=name, path='{}.{}'.format(name, file_format),
+                          profile='tabular-data-resource',
+                          format=file_format, schema=schema)
+        if 'encoding' in self.options:
+            descriptor['encoding'] = self.options['encoding']
+        return descriptor
+
     def stripper(self, iterator):
         whitespace = set(' \t\n\r')
         for r in iterator:
@@ -248,6 +599,40 @@ class load(DataStreamProcessor):
             if count >= self.limit_rows:
                 break
 
+    def projector(self, iterator, fields):
+        for row in iterator:
+            yield dict((k, row[k]) for k in fields if k in row)
+
+    def row_filter(self, descriptor, iterator, filters, field_names):
+        # Conditions are checked against values prepared the same way the caster and stripper would
+        conditions = [old_style_conditions(f['equals'], f['not_equals']) for f in filters]
+        schema_fields = {}
+        if self.cast_strategy == self.CAST_WITH_SCHEMA:
+            schema_fields = dict((f.name, f) for f in Schema(descriptor['schema']).fields if f.name in field_names)
+        whitespace = set(' \t\n\r')
+        for row in iterator:
+            values = {}
+            for name in field_names:
+                value = row.get(name)
+                if name in schema_fields:
+                    try:
+                        value = schema_fields[name].cast_value(value)
+                    except CastError:
+                        # Left for the caster to handle
+                        values = None
+                        break
+                elif name not in row:
+                    values = None
+                    break
+                elif self.cast_strategy == self.CAST_TO_STRINGS and not isinstance(value, str):
+                    value = str(value)
+                if self.strip and value and isinstance(value, str) and \
+                        (value[-1] in whitespace or value[0] in whitespace):
+                    value = value.strip()
+                values[name] = value
+            if values is None or all(condition(values) for condition in conditions):
+                yield row
+
     def stringer(self, iterator):
         for r in iterator:
             yield dict(
@@ -272,8 +657,19 @@ class load(DataStreamProcessor):
     def process_resources(self, resources):
         yield from super(load, self).process_resources(resources)
         for descriptor, it in zip(self.resource_descriptors, self.iterators):
+            name = descriptor['name']
+            if name in self.projections and name not in self.projected_at_source:
+                it = self.projector(it, self.projections[name])
+            if name in self.predicates:
+                it = self.row_filter(descriptor, it, *self.predicates[name])
             if self.extract_missing_values:
                 it = self.missing_values_extractor(it)
+            if name in self.projections:
+                # Fields which aren't read are not cast
+                descriptor = copy.deepcopy(descriptor)
+                descriptor['schema']['fields'] = [
+                    f for f in descriptor['schema']['fields'] if f['name'] in self.projections[name]
+                ]
             it = self.caster(descriptor, it)
             if self.strip:
                 it = self.stripper(it)
@@ -2,3 +2,4 @@ from .xml_parser import XMLParser
 from .excel_xml_parser import ExcelXMLParser
 from .sql_parser import ExtendedSQLParser
 from .geojson_parser import GeoJsonParser
+from .xlsx_parser import XLSXParser
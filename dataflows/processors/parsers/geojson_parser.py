@@ -1,29 +1,114 @@
 import json
 import decimal
 
-from tabulator.parsers.json import JSONParser
+import ijson
+from tabulator import exceptions, helpers
+from tabulator.parser import Parser
 
+# Separates the features of GeoJSON text sequences (RFC 8142)
+RECORD_SEPARATOR = b'\x1e'
 
-class DecimalJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
 
-        if isinstance(obj, decimal.Decimal):
-            return float(obj)
-        return super().default(obj)
+class RecordSeparatorStripper(object):
+    """Byte stream which reads record separators as whitespace"""
 
+    def __init__(self, stream):
+        self.stream = stream
+
+    def read(self, size=-1):
+        return self.stream.read(size).replace(RECORD_SEPARATOR, b' ')
+
+
+def to_floats(value):
+    # Numbers are parsed as decimals (like tabulator's json parser does), geometries are encoded with floats
+    if isinstance(value, list):
+        return [
+            float(v) if type(v) is decimal.Decimal else to_floats(v) if isinstance(v, (list, dict)) else v
+            for v in value
+        ]
+    if isinstance(value, dict):
+        return dict((k, to_floats(v)) for k, v in value.items())
+    if type(value) is decimal.Decimal:
+        return float(value)
+    return value
+
+
+class GeoJsonParser(Parser):
+    """Streams features of a GeoJSON FeatureCollection, or of a sequence of GeoJSON features
+
+    Features are parsed one at a time, so the full document is never held in memory.
+    Sequences can be newline delimited, or use record separators (`application/geo+json-seq`).
+    """
 
-class GeoJsonParser(JSONParser):
     options = []
 
     def __init__(self, loader, force_parse=False):
-        super().__init__(loader, force_parse=force_parse, property='features')
+        self.__loader = loader
+        self.__force_parse = force_parse
+        self.__extended_rows = None
+        self.__encoding = None
+        self.__bytes = None
+
+    @property
+    def closed(self):
+        return self.__bytes is None or self.__bytes.closed
+
+    def open(self, source, encoding=None):
+        self.close()
+        self.__encoding = encoding
+        self.__bytes = self.__loader.load(source, mode='b', encoding=encoding)
+        self.reset()
+
+    def close(self):
+        if not self.closed:
+            self.__bytes.close()
+
+    def reset(self):
+        helpers.reset_stream(self.__bytes)
+        self.__extended_rows = self.__iter_extended_rows()
+
+    @property
+    def encoding(self):
+        return self.__encoding
 
     @property
     def extended_rows(self):
-        iterator = super().extended_rows
-        for row_number, keys, values in iterator:
-            row = dict(zip(keys, values))
-            properties = row.get('properties', dict())
-            properties['__geometry'] = json.dumps(row.get('geometry'), cls=DecimalJSONEncoder)
-            items = list(properties.items())
-            yield row_number, list(x[0] for x in items), list(x[1] for x in items)
+        return self.__extended_rows
+
+    # Private
+
+    def __is_collection(self):
+        # A collection is a single object with a `features` member, unlike a sequence of features.
+        # Only the events up to the `features` member (or up to the end of the first feature) are read
+        events = ijson.parse(RecordSeparatorStripper(self.__bytes), multiple_values=True)
+        try:
+            for prefix, event, value in events:
+                if prefix == '' and event == 'map_key' and value == 'features':
+                    return True
+                if prefix == '' and event == 'end_map':
+                    return False
+        finally:
+            helpers.reset_stream(self.__bytes)
+        return False
+
+    def __iter_features(self):
+        if self.__is_collection():
+            yield from ijson.items(self.__bytes, 'features.item')
+        else:
+            items = ijson.items(RecordSeparatorStripper(self.__bytes), '', multiple_values=True)
+            for item in items:
+                if isinstance(item, dict) and item.get('type') == 'FeatureCollection':
+                    yield from item.get('features') or []
+                else:
+                    yield item
+
+    def __iter_extended_rows(self):
+        for row_number, feature in enumerate(self.__iter_features(), start=1):
+            if not isinstance(feature, dict):
+                if not self.__force_parse:
+                    raise exceptions.SourceError('GeoJSON feature has to be an object')
+                yield (row_number, None, [])
+                continue
+            properties = feature.get('properties') or dict()
+            properties['__geometry'] = json.dumps(to_floats(feature.get('geometry')))
+            yield (row_number, list(properties.keys()), list(properties.values()))
@@ -1,9 +1,24 @@
 # -*- coding: utf-8 -*-
 
-from sqlalchemy import sql, create_engine
+import queue
+import threading
+
+from sqlalchemy import sql, create_engine, inspect, Integer
 from tabulator import exceptions
 from tabulator.parser import Parser
 
+# Engines are shared by all parsers reading from the same database URL, so their connection pools are reused
+ENGINES = {}
+ENGINES_LOCK = threading.Lock()
+
+
+def get_engine(url):
+    with ENGINES_LOCK:
+        engine = ENGINES.get(url)
+        if engine is None:
+            engine = ENGINES[url] = create_engine(url)
+        return engine
+
 
 class ExtendedSQLParser(Parser):
     """Parser to get data from SQL database.
@@ -14,18 +29,37 @@ class ExtendedSQLParser(Parser):
     options = [
         'table',
         'order_by',
-        'query'
+        'query',
+        'fields',
+        'filters',
+        'fetch_size',
+        'partitions',
+        'partition_by',
     ]
 
-    def __init__(self, loader, force_parse=False, table=None, order_by=None, query=None):
+    DEFAULT_FETCH_SIZE = 1000
+    # Number of partitions which are read at the same time
+    MAX_WORKERS = 8
+    # Number of batches each partition reads ahead of the rows being consumed
+    QUEUE_SIZE = 4
+
+    def __init__(self, loader, force_parse=False, table=None, order_by=None, query=None,
+                 fields=None, filters=None, fetch_size=None, partitions=None, partition_by=None):
         if query is None and table is None:
             raise exceptions.TabulatorException('Format `sql` requires `table` or `query` options.')
+        if partitions and query is not None:
+            raise exceptions.TabulatorException('Option `partitions` requires the `table` option.')
 
         # Set attributes
         self.__loader = loader
         self.__table = table
         self.__order_by = order_by
         self.__query = query
+        self.__fields = fields
+        self.__filters = filters
+        self.__fetch_size = fetch_size or self.DEFAULT_FETCH_SIZE
+        self.__partitions = partitions
+        self.__partition_by = partition_by
         self.__force_parse = force_parse
         self.__engine = None
         self.__extended_rows = None
@@ -37,17 +71,18 @@ class ExtendedSQLParser(Parser):
 
     def open(self, source, encoding=None):
         self.close()
-        self.__engine = create_engine(source)
-        self.__engine.update_execution_options(stream_results=True)
+        self.__engine = get_engine(source)
         self.__encoding = encoding
         self.reset()
 
     def close(self):
+        # The engine (and its pooled connections) is kept for other parsers using the same database
         if not self.closed:
-            self.__engine.dispose()
+            self.__close_rows()
             self.__engine = None
 
     def reset(self):
+        self.__close_rows()
         self.__extended_rows = self.__iter_extended_rows()
 
     @property
@@ -59,15 +94,149 @@ class ExtendedSQLParser(Parser):
         return self.__extended_rows
 
     # Private
-    def __iter_extended_rows(self):
+    def __close_rows(self):
+        # Stops reading partitions and returns connections to the pool, if not all rows were read
+        if self.__extended_rows is not None:
+            self.__extended_rows.close()
+            self.__extended_rows = None
+
+    def __where(self, filter):
+        # Same as filter_rows' `equals`/`not_equals`: a row matches if any of the conditions holds
+        clauses = [
+            sql.column(k) == v
+            for o in filter.get('equals', [])
+            for k, v in o.items()
+        ] + [
+            sql.column(k).is_distinct_from(v)
+            for o in filter.get('not_equals', [])
+            for k, v in o.items()
+        ]
+        return sql.or_(*clauses) if clauses else sql.false()
+
+    def __build_query(self, key=None, key_range=None):
         if self.__query is not None:
-            query = sql.text(self.__query)
+            return sql.text(self.__query)
+        table = sql.table(self.__table)
+        if self.__order_by:
+            order = sql.text(self.__order_by)
         else:
-            table = sql.table(self.__table)
-            order = sql.text(self.__order_by) if self.__order_by else None
-            query = sql.select(sql.text('*')).select_from(table).order_by(order)
-        with self.__engine.connect() as connection:
-            result = connection.execute(query)
-            for row_number, row in enumerate(iter(result), start=1):
-                row = row._asdict()
-                yield (row_number, list(row.keys()), list(row.values()))
+            order = sql.column(key) if key is not None else None
+        columns = [sql.column(f) for f in self.__fields] if self.__fields else [sql.text('*')]
+        query = sql.select(*columns).select_from(table).order_by(order)
+        if self.__filters:
+            query = query.where(*[self.__where(f) for f in self.__filters])
+        if key_range is not None:
+            start, end = key_range
+            clause = sql.column(key) >= start
+            if end is not None:
+                clause = sql.and_(clause, sql.column(key) < end)
+            else:
+                # Rows without a key are read with the last partition
+                clause = sql.or_(clause, sql.column(key).is_(None))
+            query = query.where(clause)
+        return query
+
+    def __partition_key(self):
+        # An integer primary key (or the `partition_by` column) is split into ranges of keys
+        if self.__engine.dialect.name == 'sqlite' and self.__engine.url.database in (None, '', ':memory:'):
+            # Each thread would get its own in-memory database
+            return None
+        try:
+            columns = inspect(self.__engine).get_columns(self.__table)
+            primary_key = inspect(self.__engine).get_pk_constraint(self.__table)['constrained_columns']
+        except Exception:
+            return None
+        key = self.__partition_by
+        if key is None:
+            if len(primary_key) != 1:
+                return None
+            key = primary_key[0]
+        for column in columns:
+            if column['name'] == key and isinstance(column['type'], Integer):
+                return key
+        return None
+
+    def __key_ranges(self, connection, key):
+        query = sql.select(sql.func.min(sql.column(key)), sql.func.max(sql.column(key)))\
+            .select_from(sql.table(self.__table))
+        if self.__filters:
+            query = query.where(*[self.__where(f) for f in self.__filters])
+        low, high = connection.execute(query).one()
+        if low is None:
+            return None
+        count = min(self.__partitions, high - low + 1)
+        bounds = [low + (high - low + 1) * i // count for i in range(count)]
+        return list(zip(bounds, bounds[1:] + [None]))
+
+    def __iter_result(self, connection, query):
+        result = connection.execution_options(stream_results=True, yield_per=self.__fetch_size).execute(query)
+        headers = list(result.keys())
+        for batch in result.partitions():
+            yield headers, batch
+
+    def __read_partitions(self, engine, key, tasks, stopped):
+        def put(batches, item):
+            # Waits for the consumer, unless it stopped reading
+            while not stopped.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        # Partitions are taken in order, so the one being consumed is always being read
+        while not stopped.is_set():
+            try:
+                key_range, batches = tasks.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                with engine.connect() as connection:
+                    for item in self.__iter_result(connection, self.__build_query(key, key_range)):
+                        if not put(batches, item):
+                            return
+            except Exception as e:
+                put(batches, e)
+                return
+            put(batches, None)
+
+    def __iter_batches(self, key=None):
+        key_ranges = None
+        if key is not None:
+            with self.__engine.connect() as connection:
+                key_ranges = self.__key_ranges(connection, key)
+        if not key_ranges or len(key_ranges) == 1:
+            with self.__engine.connect() as connection:
+                yield from self.__iter_result(connection, self.__build_query(key))
+            return
+        stopped = threading.Event()
+        tasks = queue.Queue()
+        queues = []
+        for key_range in key_ranges:
+            queues.append(queue.Queue(maxsize=self.QUEUE_SIZE))
+            tasks.put((key_range, queues[-1]))
+        # Daemon threads, as rows which aren't read to the end are only released when garbage collected
+        for _ in range(min(self.MAX_WORKERS, len(key_ranges))):
+            threading.Thread(target=self.__read_partitions, args=(self.__engine, key, tasks, stopped),
+                             daemon=True).start()
+        try:
+            # Partitions are emitted in the order of their keys
+            for batches in queues:
+                while True:
+                    item = batches.get()
+                    if item is None:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+        finally:
+            stopped.set()
+
+    def __iter_extended_rows(self):
+        key = self.__partition_key() if self.__partitions and self.__partitions > 1 else None
+        row_number = 0
+        for headers, batch in self.__iter_batches(key):
+            for row in batch:
+                row_number += 1
+                yield (row_number, headers, list(row))
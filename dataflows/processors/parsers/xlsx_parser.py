@@ -0,0 +1,202 @@
+from xml.etree.ElementTree import iterparse
+
+import openpyxl
+from openpyxl.utils import column_index_from_string
+from openpyxl.utils.datetime import from_excel, from_ISO8601
+from tabulator import exceptions
+from tabulator.parser import Parser
+from tabulator.parsers.xlsx import XLSXParser as TabulatorXLSXParser
+
+SHEET_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+SHEET_DATA_TAG = '{%s}sheetData' % SHEET_MAIN_NS
+ROW_TAG = '{%s}row' % SHEET_MAIN_NS
+CELL_TAG = '{%s}c' % SHEET_MAIN_NS
+VALUE_TAG = '{%s}v' % SHEET_MAIN_NS
+INLINE_STRING_TAG = '{%s}is' % SHEET_MAIN_NS
+TEXT_TAG = '{%s}t' % SHEET_MAIN_NS
+RUN_TAG = '{%s}r' % SHEET_MAIN_NS
+DIGITS = '0123456789'
+# Internals of openpyxl's read-only workbooks and worksheets the rows are parsed with
+BOOK_ATTRIBUTES = ('_archive', '_date_formats', '_timedelta_formats', 'epoch')
+SHEET_ATTRIBUTES = ('_worksheet_path', '_shared_strings')
+
+
+class XLSXParser(Parser):
+    """Streams rows of a single worksheet from a local Excel file
+
+    The workbook is opened in read-only mode, so only the requested sheet is read, row by row.
+    Rows are parsed directly from the worksheet's XML into the values openpyxl reads, without building cell objects.
+    Remote files and the options which require the full workbook (`fill_merged_cells`, `preserve_formatting`
+    and `adjust_floating_point_error`) are handled by tabulator's parser.
+    """
+
+    options = TabulatorXLSXParser.options
+
+    def __init__(self, loader, force_parse=False, sheet=1, workbook_cache=None, fill_merged_cells=False,
+                 preserve_formatting=False, adjust_floating_point_error=False):
+        self.__loader = loader
+        self.__force_parse = force_parse
+        self.__sheet_pointer = sheet
+        self.__extended_rows = None
+        self.__encoding = None
+        self.__fragment = None
+        self.__bytes = None
+        self.__book = None
+        self.__sheet = None
+        self.__parser = None
+        if getattr(loader, 'remote', False) or fill_merged_cells or preserve_formatting or \
+                adjust_floating_point_error:
+            self.__parser = TabulatorXLSXParser(
+                loader, force_parse=force_parse, sheet=sheet, workbook_cache=workbook_cache,
+                fill_merged_cells=fill_merged_cells, preserve_formatting=preserve_formatting,
+                adjust_floating_point_error=adjust_floating_point_error
+            )
+
+    @property
+    def closed(self):
+        if self.__parser is not None:
+            return self.__parser.closed
+        return self.__bytes is None or self.__bytes.closed
+
+    def open(self, source, encoding=None):
+        if self.__parser is not None:
+            return self.__parser.open(source, encoding=encoding)
+        self.close()
+        self.__encoding = encoding
+        self.__bytes = self.__loader.load(source, mode='b', encoding=encoding)
+        self.__book = openpyxl.load_workbook(self.__bytes, read_only=True, data_only=True)
+        try:
+            if isinstance(self.__sheet_pointer, str):
+                self.__sheet = self.__book[self.__sheet_pointer]
+            else:
+                self.__sheet = self.__book.worksheets[self.__sheet_pointer - 1]
+        except (KeyError, IndexError):
+            self.close()
+            message = 'Excel document "%s" doesn\'t have a sheet "%s"'
+            raise exceptions.SourceError(message % (source, self.__sheet_pointer))
+        self.__fragment = self.__sheet.title
+        self.reset()
+
+    def close(self):
+        if self.__parser is not None:
+            return self.__parser.close()
+        if self.__book is not None:
+            self.__book.close()
+            self.__book = None
+        if not self.closed:
+            self.__bytes.close()
+
+    def reset(self):
+        if self.__parser is not None:
+            return self.__parser.reset()
+        self.__extended_rows = self.__iter_extended_rows()
+
+    @property
+    def encoding(self):
+        if self.__parser is not None:
+            return self.__parser.encoding
+        return self.__encoding
+
+    @property
+    def fragment(self):
+        if self.__parser is not None:
+            return self.__parser.fragment
+        return self.__fragment
+
+    @property
+    def extended_rows(self):
+        if self.__parser is not None:
+            return self.__parser.extended_rows
+        return self.__extended_rows
+
+    # Private
+
+    def __iter_extended_rows(self):
+        # Other versions of openpyxl may not have the same internals, in which case its own rows are used
+        if all(hasattr(self.__book, name) for name in BOOK_ATTRIBUTES) and \
+                all(hasattr(self.__sheet, name) for name in SHEET_ATTRIBUTES):
+            rows = self.__iter_values()
+        else:
+            rows = self.__sheet.iter_rows(values_only=True)
+        for row_number, row in enumerate(rows, start=1):
+            yield (row_number, None, list(row))
+
+    def __iter_values(self):
+        # Same as the sheet's iter_rows(values_only=True): rows are padded to the sheet's dimensions,
+        # missing rows are filled in with empty ones
+        max_column = self.__sheet.max_column
+        max_row = self.__sheet.max_row
+        empty_row = [None] * max_column if max_column else []
+        columns = {}
+        row_number = 0
+        with self.__book._archive.open(self.__sheet._worksheet_path) as source:
+            sheet_data = None
+            for event, element in iterparse(source, events=('start', 'end')):
+                if event == 'start':
+                    if element.tag == SHEET_DATA_TAG:
+                        sheet_data = element
+                    continue
+                if element.tag != ROW_TAG:
+                    continue
+                index = element.get('r')
+                index = int(float(index)) if index else row_number + 1
+                if max_row is not None and index > max_row:
+                    break
+                while row_number + 1 < index:
+                    row_number += 1
+                    yield list(empty_row)
+                row_number = index
+                values = []
+                for cell in element:
+                    coordinate = cell.get('r')
+                    if coordinate:
+                        letters = coordinate.rstrip(DIGITS)
+                        column = columns.get(letters)
+                        if column is None:
+                            column = columns[letters] = column_index_from_string(letters)
+                    else:
+                        column = len(values) + 1
+                    if max_column and column > max_column:
+                        continue
+                    if column > len(values) + 1:
+                        values.extend([None] * (column - len(values) - 1))
+                    values[column - 1:] = [self.__cell_value(cell)]
+                if max_column and len(values) < max_column:
+                    values.extend([None] * (max_column - len(values)))
+                if sheet_data is not None:
+                    sheet_data.clear()
+                else:
+                    element.clear()
+                yield values
+        if max_row is not None:
+            for _ in range(row_number, max_row):
+                yield list(empty_row)
+
+    def __cell_value(self, cell):
+        data_type = cell.get('t', 'n')
+        if data_type == 'inlineStr':
+            child = cell.find(INLINE_STRING_TAG)
+            if child is None:
+                return None
+            runs = child.iter(RUN_TAG)
+            return (child.findtext(TEXT_TAG) or '') + ''.join(run.findtext(TEXT_TAG) or '' for run in runs)
+        value = cell.findtext(VALUE_TAG) or None
+        if value is None:
+            return None
+        if data_type == 'n':
+            value = float(value) if '.' in value or 'E' in value or 'e' in value else int(value)
+            style_id = cell.get('s')
+            if style_id is not None and int(style_id) in self.__book._date_formats:
+                try:
+                    return from_excel(value, self.__book.epoch,
+                                      timedelta=int(style_id) in self.__book._timedelta_formats)
+                except (OverflowError, ValueError):
+                    return '#VALUE!'
+            return value
+        elif data_type == 's':
+            return self.__sheet._shared_strings[int(value)]
+        elif data_type == 'b':
+            return bool(int(value))
+        elif data_type == 'd':
+            return from_ISO8601(value)
+        return value
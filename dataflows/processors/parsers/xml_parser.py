@@ -3,11 +3,14 @@ from tabulator.helpers import reset_stream
 
 
 class XMLParser(Parser):
-    options = []
+    options = [
+        'record_path',
+    ]
 
-    def __init__(self, loader, force_parse, **options):
+    def __init__(self, loader, force_parse, record_path=None):
         self.__loader = loader
         self.__force_parse = force_parse
+        self.__record_path = record_path.strip('/').split('/') if record_path else None
         self.__extended_rows = None
         self.__encoding = None
         self.__chars = None
@@ -43,15 +46,30 @@ class XMLParser(Parser):
     # Private
 
     def __iter_extended_rows(self):
-        from xml.etree.ElementTree import parse
+        from xml.etree.ElementTree import iterparse
         from xmljson import parker
 
-        parsed = parker.data(parse(self.__chars).getroot())
-        elements = list(parsed.values())
-        if len(elements) > 0:
-            elements = elements[0]
-        else:
-            elements = []
-        for row_number, row in enumerate(elements, start=1):
-            keys, values = zip(*(row.items()))
-            yield (row_number, list(keys), list(values))
+        # Records are converted as soon as they're closed, and removed from the tree right after.
+        # By default, records are the children of the root element which have the tag of its first child.
+        record_path = self.__record_path
+        path = []
+        elements = []
+        row_number = 0
+        for event, element in iterparse(self.__chars, events=('start', 'end')):
+            if event == 'start':
+                elements.append(element)
+                path.append(element.tag)
+                if record_path is None and len(path) == 2:
+                    record_path = path[1:]
+                continue
+            elements.pop()
+            if path[1:] == record_path:
+                row = parker.data(element)
+                elements[-1].remove(element)
+                if isinstance(row, dict) and len(row) > 0:
+                    row_number += 1
+                    yield (row_number, list(row.keys()), list(row.values()))
+            elif elements and record_path is not None and len(path) - 1 <= len(record_path):
+                # Not a record, nor inside one
+                elements[-1].remove(element)
+            path.pop()
@@ -52,4 +52,6 @@ def select_fields(fields, resources=None, regex=True):
             else:
                 yield process_resource(resource, configuration)
 
+    # Lets a preceding load skip reading the other fields
+    func.pushdown = dict(select=fields, resources=resources, regex=regex)
     return func
@@ -8,38 +8,72 @@ from ..helpers.resource_matcher import ResourceMatcher
 FIELDS_RE = re.compile(r'(\{[^\}]+\})')
 KEY_RE = re.compile(r'[^!:\}]+')
 
+# Values of list keys are each followed by a separator which sorts before any character, so a value which is a prefix
+# of another sorts first regardless of the following fields. Characters up to the escape character are escaped.
+FIELD_SEPARATOR = '\x01'
+ESCAPES = str.maketrans({'\x00': '\x02\x01', '\x01': '\x02\x02', '\x02': '\x02\x03'})
+NULL_VALUE = '\x02'
+VALUE_PREFIX = '\x03'
+
+
+def number_key(value):
+    # https://www.h-schmidt.net/FloatConverter/IEEE754.html
+    bits = BitArray(float=value, length=64)
+    # invert the sign bit
+    bits.invert(0)
+    # invert negative numbers
+    if value < 0:
+        bits.invert(range(1, 64))
+    return bits.hex
+
+
+def field_key(value):
+    # Nulls sort before any other value
+    if value is None:
+        return NULL_VALUE + FIELD_SEPARATOR
+    if isinstance(value, (int, float, decimal.Decimal)):
+        value = number_key(value)
+    return VALUE_PREFIX + str(value).translate(ESCAPES) + FIELD_SEPARATOR
+
 
 class KeyCalc(object):
     def __init__(self, key_spec):
         self.calculator = self.__calculator(key_spec)
+        self.fields = self.__fields(key_spec)
+
+    def __fields(self, key_spec):
+        # Names of the fields the rows are ordered by, when the key preserves their natural order.
+        # Values concatenated by a format string don't keep the boundaries between fields (e.g. 'a' + 'c' > 'ab' + ''),
+        # so only a format string of a single field is ordered by it.
+        if isinstance(key_spec, (list, tuple)):
+            return list(key_spec)
+        if isinstance(key_spec, str):
+            formatters = FIELDS_RE.findall(key_spec)
+            fields = [KEY_RE.findall(fmt[1:])[0] for fmt in formatters]
+            if len(fields) == 1 and formatters[0] == '{' + fields[0] + '}':
+                return fields
+        return None
 
     def __calculator(self, key_spec):
         if callable(key_spec):
             return key_spec
-        formatters = None
+        if isinstance(key_spec, (list, tuple)):
+            def func(row):
+                return ''.join(field_key(row[key]) for key in key_spec)
+            return func
         if isinstance(key_spec, str):
             formatters = FIELDS_RE.findall(key_spec)
             key_spec = [KEY_RE.findall(fmt[1:])[0] for fmt in formatters]
-        if isinstance(key_spec, (list, tuple)):
+
             def func(row):
                 ret = ''
                 for i, key in enumerate(key_spec):
                     value = row[key]
                     # numbers
-                    # https://www.h-schmidt.net/FloatConverter/IEEE754.html
-                    raw = not formatters or formatters[i] == '{' + key + '}'
+                    raw = formatters[i] == '{' + key + '}'
                     if raw and isinstance(value, (int, float, decimal.Decimal)):
-                        bits = BitArray(float=value, length=64)
-                        # invert the sign bit
-                        bits.invert(0)
-                        # invert negative numbers
-                        if value < 0:
-                            bits.invert(range(1, 64))
-                        value = bits.hex
-                    if formatters:
-                        ret += formatters[i].format(**{key: value})
-                    else:
-                        ret += str(value)
+                        value = number_key(value)
+                    ret += formatters[i].format(**{key: value})
                 return ret
             return func
         assert False, 'key should be either a format string or a row->string callable'
@@ -62,6 +96,30 @@ def _sorter(rows, key_calc, reverse, batch_size):
     db.close()
 
 
+class SortedRows(object):
+    def __init__(self, rows, key_calc, reverse, batch_size):
+        self.rows = rows
+        self.key_calc = key_calc
+        self.reverse = reverse
+        self.batch_size = batch_size
+        self.it = None
+
+    def sorted_by(self, fields):
+        # Are rows sorted in ascending order by fields (or a prefix of them)?
+        sort_fields = self.key_calc.fields
+        if self.reverse or sort_fields is None:
+            return False
+        return sort_fields[:len(fields)] == list(fields)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.it is None:
+            self.it = _sorter(self.rows, self.key_calc, self.reverse, self.batch_size)
+        return next(self.it)
+
+
 def sort_rows(key, resources=None, reverse=False, batch_size=1000):
     key_calc = KeyCalc(key)
 
@@ -70,7 +128,7 @@ def sort_rows(key, resources=None, reverse=False, batch_size=1000):
         yield package.pkg
         for rows in package:
             if matcher.match(rows.res.name):
-                yield _sorter(rows, key_calc, reverse, batch_size)
+                yield SortedRows(rows, key_calc, reverse, batch_size)
             else:
                 yield rows
 
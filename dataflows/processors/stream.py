@@ -1,38 +1,99 @@
 import sys
 import os
+import time
 
-from ..helpers.extended_json import ejson
+from ..helpers.extended_json import ejson, SchemaRowCodec
+from ..helpers.binary_stream import BinaryStreamWriter
 
 ACTIVE_SUFFIX = '.active'
 
 
-def stream(file=sys.stdout):
+class Flusher(object):
+
+    def __init__(self, file, rows=None, size=None, seconds=None):
+        self.file = file
+        self.max_rows = rows
+        self.max_size = size
+        self.max_seconds = seconds
+        self.reset()
+
+    def reset(self):
+        self.rows = 0
+        self.size = 0
+        if self.max_seconds:
+            self.last = time.monotonic()
+
+    def wrote(self, size):
+        self.rows += 1
+        self.size += size
+        if (self.max_rows and self.rows >= self.max_rows) or \
+                (self.max_size and self.size >= self.max_size) or \
+                (self.max_seconds and time.monotonic() - self.last >= self.max_seconds):
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        self.reset()
+
+
+def stream(file=sys.stdout, format='ndjson', compression=None, batch_size=1000,
+           flush_rows=1000, flush_bytes=None, flush_seconds=None, schema_aware=True):
 
     filename = None
+    binary = format == 'binary'
+    assert binary or format == 'ndjson', 'Unknown stream format {!r}'.format(format)
 
     if isinstance(file, str):
         filename = file + ACTIVE_SUFFIX
         basedir = os.path.dirname(filename)
         os.makedirs(basedir, exist_ok=True)
-        file = open(filename, 'w')
+        file = open(filename, 'wb' if binary else 'w')
+    elif binary and hasattr(file, 'buffer'):
+        file = file.buffer
 
-    def write(obj):
-        file.write(ejson.dumps(obj, sort_keys=True, ensure_ascii=True)+'\n')
-        file.flush()
+    flusher = Flusher(file, rows=flush_rows, size=flush_bytes, seconds=flush_seconds)
+
+    def write(obj, codec=None):
+        line = codec.encode(obj) if codec is not None else None
+        if line is None:
+            line = ejson.dumps(obj, sort_keys=True, ensure_ascii=True)
+        line += '\n'
+        file.write(line)
+        flusher.wrote(len(line))
 
     def res_writer(res):
+        # Rows matching the schema are written as arrays of values
+        codec = SchemaRowCodec(res.res.descriptor.get('schema', {})) if schema_aware else None
         for r in res:
-            write(r)
+            write(r, codec)
             yield r
 
     def func(package):
         write(package.pkg.descriptor)
+        flusher.flush()
         yield package.pkg
         for res in package:
             yield res_writer(res)
+            # The separator is written once the next resource is requested, even if the rows
+            # of this one were not all consumed. Completed resources are always flushed.
             file.write('\n')
+            flusher.flush()
         file.close()
-        if filename:
-            os.rename(filename, filename[:-len(ACTIVE_SUFFIX)])
 
-    return func
+    def binary_func(package):
+        writer = BinaryStreamWriter(file, compression=compression, batch_size=batch_size)
+        writer.write_descriptor(package.pkg.descriptor)
+        yield package.pkg
+        for res in package:
+            field_names = [f['name'] for f in res.res.descriptor.get('schema', {}).get('fields', [])]
+            yield writer.write_resource(res.res.name, field_names, res)
+        writer.close()
+
+    def rename(step):
+        def func(package):
+            yield from step(package)
+            if filename:
+                os.rename(filename, filename[:-len(ACTIVE_SUFFIX)])
+        return func
+
+    return rename(binary_func if binary else func)
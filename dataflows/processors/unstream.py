@@ -2,32 +2,69 @@ import sys
 
 from datapackage import Package
 
-from ..helpers.extended_json import ejson
+from ..helpers.extended_json import SchemaRowCodec, loads_line
+from ..helpers.binary_stream import BinaryStreamReader, is_binary_stream
+from ..helpers.resource_matcher import ResourceMatcher
 
 
-def unstream(file=sys.stdin):
+def unstream(file=sys.stdin, resources=None):
 
     if isinstance(file, str):
-        file = open(file)
+        filename = file
+        file = open(filename, 'rb')
+        if not is_binary_stream(file):
+            file.close()
+            file = open(filename)
 
-    def read():
+    binary = 'b' in getattr(file, 'mode', '') and is_binary_stream(file)
+
+    def read(codec=None):
         line = file.readline().strip()
         if len(line) > 0:
-            return ejson.loads(line)
+            if isinstance(line, bytes):
+                line = line.decode('utf8')
+            if codec is not None and line[0] == '[':
+                return codec.decode(line)
+            return loads_line(line)
         return None
 
-    def res_reader():
+    def skip():
+        while file.readline().strip():
+            pass
+
+    def res_reader(resource):
+        codec = SchemaRowCodec(resource.get('schema', {}))
         while True:
-            r = read()
+            r = read(codec)
             if r is not None:
                 yield r
             else:
                 break
 
+    def select(descriptor):
+        matcher = ResourceMatcher(resources, descriptor)
+        selected = [matcher.match(res['name']) for res in descriptor['resources']]
+        descriptor['resources'] = [res for res, s in zip(descriptor['resources'], selected) if s]
+        return selected
+
     def func(package):
         descriptor = read()
+        all_resources = descriptor['resources']
+        selected = select(descriptor)
+        yield Package(descriptor)
+        for s, resource in zip(selected, all_resources):
+            if s:
+                yield res_reader(resource)
+            else:
+                skip()
+
+    def binary_func(package):
+        reader = BinaryStreamReader(file)
+        descriptor = reader.descriptor
+        selected = select(descriptor)
         yield Package(descriptor)
-        for _ in descriptor['resources']:
-            yield res_reader()
+        for s, entry in zip(selected, reader.index):
+            if s:
+                yield reader.read_resource(entry)
 
-    return func
+    return binary_func if binary else func
@@ -0,0 +1,233 @@
+import copy
+import collections
+
+from dataflows import PackageWrapper, ResourceWrapper
+
+from ..helpers.resource_matcher import ResourceMatcher
+from .sort_rows import KeyCalc, SortedRows, _sorter
+
+
+# Window functions
+class RowNumber(object):
+
+    def __init__(self, spec):
+        self.count = 0
+
+    def reset(self):
+        self.count = 0
+
+    def __call__(self, row, order_key):
+        self.count += 1
+        return self.count
+
+
+class Rank(RowNumber):
+
+    def __init__(self, spec):
+        super(Rank, self).__init__(spec)
+        self.dense = spec['function'] == 'dense_rank'
+        self.reset()
+
+    def reset(self):
+        super(Rank, self).reset()
+        self.rank = 0
+        self.last_key = None
+
+    def __call__(self, row, order_key):
+        self.count += 1
+        if self.count == 1 or order_key != self.last_key:
+            self.rank = self.rank + 1 if self.dense else self.count
+            self.last_key = order_key
+        return self.rank
+
+
+class Lag(object):
+
+    def __init__(self, spec):
+        self.name = spec['name']
+        self.default = spec.get('default')
+        self.values = collections.deque(maxlen=spec.get('offset', 1))
+
+    def reset(self):
+        self.values.clear()
+
+    def __call__(self, row, order_key):
+        if len(self.values) == self.values.maxlen:
+            ret = self.values[0]
+        else:
+            ret = self.default
+        self.values.append(row.get(self.name))
+        return ret
+
+
+class FrameAggregate(object):
+
+    def __init__(self, spec):
+        self.name = spec['name']
+        self.size = spec.get('rows')
+        self.function = spec['function']
+        self.reset()
+
+    def reset(self):
+        # Only the values within the frame are kept in memory
+        self.values = collections.deque()
+        self.total = None
+        self.count = 0
+
+    def __call__(self, row, order_key):
+        value = row.get(self.name)
+        self.add(value)
+        if self.size is not None:
+            self.values.append(value)
+            if len(self.values) > self.size:
+                self.remove(self.values.popleft())
+        return self.result()
+
+    def add(self, value):
+        if value is not None:
+            self.total = value if self.total is None else self.total + value
+            self.count += 1
+
+    def remove(self, value):
+        if value is not None:
+            self.count -= 1
+            self.total = None if self.count == 0 else self.total - value
+
+    def result(self):
+        if self.function == 'count':
+            return self.count
+        elif self.function == 'avg':
+            return self.total / self.count if self.count > 0 else None
+        return self.total
+
+
+class FrameExtremum(FrameAggregate):
+
+    def add(self, value):
+        if value is not None and self.size is None:
+            func = min if self.function == 'min' else max
+            self.total = value if self.total is None else func(self.total, value)
+
+    def remove(self, value):
+        pass
+
+    def result(self):
+        if self.size is None:
+            return self.total
+        values = [v for v in self.values if v is not None]
+        if len(values) == 0:
+            return None
+        return min(values) if self.function == 'min' else max(values)
+
+
+WindowFunction = collections.namedtuple('WindowFunction', ['factory', 'dataType'])
+WINDOW_FUNCTIONS = {
+    'row_number': WindowFunction(RowNumber, 'integer'),
+    'rank': WindowFunction(Rank, 'integer'),
+    'dense_rank': WindowFunction(Rank, 'integer'),
+    'lag': WindowFunction(Lag, None),
+    'lead': WindowFunction(None, None),
+    'sum': WindowFunction(FrameAggregate, None),
+    'count': WindowFunction(FrameAggregate, 'integer'),
+    'avg': WindowFunction(FrameAggregate, 'number'),
+    'min': WindowFunction(FrameExtremum, None),
+    'max': WindowFunction(FrameExtremum, None),
+}
+
+
+# Input helpers
+def fix_fields(fields):
+    fields = copy.deepcopy(fields)
+    for name, spec in fields.items():
+        assert spec.get('function') in WINDOW_FUNCTIONS, \
+            'Unknown window function {!r} for field {}'.format(spec.get('function'), name)
+        if spec['function'] not in ('row_number', 'rank', 'dense_rank'):
+            spec.setdefault('name', name)
+    return fields
+
+
+def process_schema(resource, fields):
+    schema_fields = resource.setdefault('schema', {}).setdefault('fields', [])
+    source_fields = dict((f['name'], f) for f in schema_fields)
+    for name, spec in fields.items():
+        data_type = WINDOW_FUNCTIONS[spec['function']].dataType
+        if data_type is None:
+            source_field = source_fields.get(spec['name'])
+            if source_field is None:
+                raise KeyError('Failed to find field with name %s in resource %s' %
+                               (spec['name'], resource['name']))
+            data_type = source_field['type']
+        if name in source_fields:
+            source_fields[name]['type'] = data_type
+        else:
+            schema_fields.append(dict(name=name, type=data_type))
+
+
+# Row processing
+def windower(rows, partition_by, order_by, fields):
+    functions = [
+        (name, WINDOW_FUNCTIONS[spec['function']].factory(spec))
+        for name, spec in fields.items()
+        if spec['function'] != 'lead'
+    ]
+    leads = [
+        (name, spec['name'], spec.get('offset', 1), spec.get('default'))
+        for name, spec in fields.items()
+        if spec['function'] == 'lead'
+    ]
+    max_lead = max((offset for _, _, offset, _ in leads), default=0)
+    # Rows wait here until all the rows their leads refer to have arrived
+    pending = collections.deque()
+
+    def emit():
+        _, row = pending.popleft()
+        for name, source, offset, default in leads:
+            row[name] = pending[offset - 1][0].get(source) if len(pending) >= offset else default
+        return row
+
+    current_partition = None
+    for row in rows:
+        partition = tuple(row.get(k) for k in partition_by)
+        if partition != current_partition:
+            while pending:
+                yield emit()
+            for _, function in functions:
+                function.reset()
+            current_partition = partition
+        order_key = tuple(row.get(k) for k in order_by)
+        source = dict(row) if leads else row
+        for name, function in functions:
+            row[name] = function(source, order_key)
+        pending.append((source, row))
+        if len(pending) > max_lead:
+            yield emit()
+    while pending:
+        yield emit()
+
+
+def window(fields, partition_by=None, order_by=None, resources=None, sorted_input=False, batch_size=1000):
+    partition_by = list(partition_by or [])
+    order_by = list(order_by or [])
+    fields = fix_fields(fields)
+    sort_key = partition_by + order_by
+
+    def func(package: PackageWrapper):
+        matcher = ResourceMatcher(resources, package.pkg)
+        for resource in package.pkg.descriptor['resources']:
+            if matcher.match(resource['name']):
+                process_schema(resource, fields)
+        yield package.pkg
+
+        resource: ResourceWrapper
+        for resource in package:
+            if not matcher.match(resource.res.name):
+                yield resource
+                continue
+            rows = resource
+            already_sorted = sorted_input or len(sort_key) == 0 or \
+                (isinstance(resource.it, SortedRows) and resource.it.sorted_by(sort_key))
+            if not already_sorted:
+                rows = _sorter(rows, KeyCalc(sort_key), False, batch_size)
+            yield windower(rows, partition_by, order_by, fields)
+
+    return func
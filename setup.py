@@ -35,9 +35,15 @@ INSTALL_REQUIRES = [
     'bitstring>=3',
     'python-dateutil',
     'openpyxl',
+    'pybloom-live',
 ]
 SPEEDUP_REQUIRES = [
     'plyvel',
+    'zstandard',
+    'lz4',
+]
+ARROW_REQUIRES = [
+    'pyarrow',
 ]
 LINT_REQUIRES = [
     'pylama',
@@ -65,8 +71,9 @@ setup(
     install_requires=INSTALL_REQUIRES,
     tests_require=TESTS_REQUIRE,
     extras_require={
-        'develop': LINT_REQUIRES + TESTS_REQUIRE,
+        'develop': LINT_REQUIRES + TESTS_REQUIRE + ARROW_REQUIRES,
         'speedup': SPEEDUP_REQUIRES,
+        'arrow': ARROW_REQUIRES,
     },
     zip_safe=False,
     long_description=README,
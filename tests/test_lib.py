@@ -1,3 +1,4 @@
+import os
 import datetime
 from dataflows.base.exceptions import ProcessorError
 import pytest
@@ -718,6 +719,183 @@ def test_deduplicate():
     assert set(x['c'] for x in results[0]) == {'First'}
 
 
+def test_deduplicate_modes():
+    from dataflows import deduplicate, set_primary_key, sort_rows
+
+    a = [dict(a=i % 7, b=i) for i in range(50)]
+
+    for kw in (dict(), dict(max_keys=3), dict(error_rate=0.0001)):
+        results, _, stats = Flow(
+            a,
+            set_primary_key(['a']),
+            deduplicate(**kw),
+        ).results()
+        assert sorted(results[0], key=lambda x: x['a']) == [dict(a=i, b=i) for i in range(7)]
+        assert stats['duplicates_dropped'] == 43
+
+    results, _, stats = Flow(
+        a,
+        set_primary_key(['a']),
+        sort_rows('{a}'),
+        deduplicate(sorted_input=True),
+    ).results()
+    assert results[0] == [dict(a=i, b=i) for i in range(7)]
+    assert stats['duplicates_dropped'] == 43
+
+
+def test_aggregate():
+    from dataflows import aggregate, sort_rows
+
+    data = [
+        dict(house='Lannister', name='Jaime', age=34),
+        dict(house='Stark', name='Jon', age=17),
+        dict(house='Lannister', name='Tyrion', age=27),
+        dict(house='Targaryen', name='Daenerys', age=16),
+        dict(house='Stark', name='Arya', age=11),
+    ]
+    expected = [
+        dict(house='Lannister', max_age=34, count=2, first_name='Jaime'),
+        dict(house='Stark', max_age=17, count=2, first_name='Jon'),
+        dict(house='Targaryen', max_age=16, count=1, first_name='Daenerys'),
+    ]
+    fields = dict(
+        max_age=dict(name='age', aggregate='max'),
+        count=dict(aggregate='count'),
+        first_name=dict(name='name', aggregate='first'),
+    )
+
+    results, dp, _ = Flow(data, aggregate(['house'], fields)).results()
+    assert results[0] == expected
+    assert [f['name'] for f in dp.resources[0].schema.descriptor['fields']] == \
+        ['house', 'count', 'first_name', 'max_age']
+    assert dp.resources[0].schema.descriptor['primaryKey'] == ['house']
+
+    results, _, _ = Flow(data, sort_rows('{house}'), aggregate(['house'], fields, sorted_input=True)).results()
+    assert results[0] == expected
+
+    results, _, _ = Flow(data, aggregate(['house'], fields, max_groups=1)).results()
+    assert sorted(results[0], key=lambda r: r['house']) == expected
+
+
+def test_window():
+    from dataflows import window, sort_rows
+
+    data = [
+        dict(g='a', t=3, v=30),
+        dict(g='b', t=1, v=5),
+        dict(g='a', t=1, v=10),
+        dict(g='a', t=2, v=20),
+        dict(g='a', t=2, v=None),
+        dict(g='b', t=2, v=7),
+    ]
+    fields = dict(
+        rn=dict(function='row_number'),
+        rk=dict(function='rank'),
+        prev=dict(function='lag', name='v'),
+        next=dict(function='lead', name='v', offset=2, default=-1),
+        total=dict(function='sum', name='v'),
+        rolling=dict(function='max', name='v', rows=2),
+    )
+    expected = [
+        dict(g='a', t=1, v=10, rn=1, rk=1, prev=None, next=None, total=10, rolling=10),
+        dict(g='a', t=2, v=20, rn=2, rk=2, prev=10, next=30, total=30, rolling=20),
+        dict(g='a', t=2, v=None, rn=3, rk=2, prev=20, next=-1, total=30, rolling=20),
+        dict(g='a', t=3, v=30, rn=4, rk=4, prev=None, next=-1, total=60, rolling=30),
+        dict(g='b', t=1, v=5, rn=1, rk=1, prev=None, next=-1, total=5, rolling=5),
+        dict(g='b', t=2, v=7, rn=2, rk=2, prev=5, next=-1, total=12, rolling=7),
+    ]
+
+    results, _, _ = Flow(
+        [dict(x) for x in data],
+        window(fields, partition_by=['g'], order_by=['t']),
+    ).results()
+    assert results[0] == expected
+
+    # Input which is sorted already isn't sorted again
+    import importlib
+    window_module = importlib.import_module('dataflows.processors.window')
+    sorter = window_module._sorter
+    calls = []
+
+    def counting_sorter(*args):
+        calls.append(args)
+        return sorter(*args)
+
+    try:
+        window_module._sorter = counting_sorter
+        results, _, _ = Flow(
+            [dict(x) for x in data],
+            sort_rows(['g', 't']),
+            window(fields, partition_by=['g'], order_by=['t']),
+        ).results()
+        assert results[0] == expected
+        assert len(calls) == 0
+
+        results, _, _ = Flow(
+            [dict(x) for x in data],
+            sort_rows(['t']),
+            window(fields, partition_by=['g'], order_by=['t']),
+        ).results()
+        assert results[0] == expected
+        assert len(calls) == 1
+    finally:
+        window_module._sorter = sorter
+
+
+def test_sort_rows_nulls():
+    from dataflows import sort_rows
+
+    data = [
+        dict(a='x', b=2),
+        dict(a=None, b=1),
+        dict(a='x', b=None),
+        dict(a='None', b=None),
+    ]
+    # Nulls sort before any other value of their field
+    results, _, _ = Flow(
+        [dict(x) for x in data],
+        sort_rows(['a', 'b']),
+    ).results()
+    assert [(row['a'], row['b']) for row in results[0]] == [
+        (None, 1), ('None', None), ('x', None), ('x', 2)
+    ]
+
+    results, _, _ = Flow(
+        [dict(x) for x in data],
+        sort_rows(['a', 'b'], reverse=True),
+    ).results()
+    assert [(row['a'], row['b']) for row in results[0]] == [
+        ('x', 2), ('x', None), ('None', None), (None, 1)
+    ]
+
+
+def test_window_partition_key_boundaries():
+    from dataflows import window, sort_rows
+
+    data = [
+        dict(a='a', b='a', v=1),
+        dict(a='ab', b='x', v=2),
+        dict(a='a', b='c', v=3),
+    ]
+    fields = dict(
+        rn=dict(function='row_number'),
+        cs=dict(function='sum', name='v'),
+    )
+    expected = [
+        dict(a='a', b='a', v=1, rn=1, cs=1),
+        dict(a='a', b='c', v=3, rn=2, cs=4),
+        dict(a='ab', b='x', v=2, rn=1, cs=2),
+    ]
+
+    for steps in [[], [sort_rows(['a', 'b'])], [sort_rows('{a}{b}')]]:
+        results, _, _ = Flow(
+            [dict(x) for x in data],
+            *steps,
+            window(fields, partition_by=['a'], order_by=['b']),
+        ).results()
+        assert results[0] == expected
+
+
 def test_duplicate():
     from dataflows import duplicate
 
@@ -758,6 +936,23 @@ def test_duplicate_many_rows():
     assert len(results[0]) == 10000
     assert len(results[1]) == 10000
 
+
+def test_duplicate_spill():
+    from dataflows import duplicate
+
+    def modify(row):
+        row['b'].append(0)
+
+    f = Flow(
+        ({'a': i, 'b': [i]} for i in range(1000)),
+        duplicate(max_buffered_rows=100, batch_size=30),
+        modify,
+    )
+
+    results, _, _ = f.results()
+    assert results[0] == [{'a': i, 'b': [i, 0]} for i in range(1000)]
+    assert results[1] == [{'a': i, 'b': [i, 0]} for i in range(1000)]
+
 def test_duplicate_to_end():
     from dataflows import duplicate
 
@@ -1413,6 +1608,69 @@ def test_load_xml():
     ]
 
 
+def test_load_xml_record_path():
+    from dataflows import Flow, load
+
+    os.makedirs('out', exist_ok=True)
+    with open('out/test_load_xml_record_path.xml', 'w') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>'
+                '<export><meta><count>3</count></meta><items>'
+                '<item><id>1</id><name>a</name><tags><tag>x</tag><tag>y</tag></tags></item>'
+                '<skipped><id>0</id></skipped>'
+                '<item><id>2</id><name>b</name><tags><tag>z</tag></tags></item>'
+                '<item><id>3</id><name>c</name></item>'
+                '</items></export>')
+
+    results, _, _ = Flow(load('out/test_load_xml_record_path.xml', record_path='items/item')).results()
+    assert results[0] == [
+        {'id': 1, 'name': 'a', 'tags': {'tag': ['x', 'y']}},
+        {'id': 2, 'name': 'b', 'tags': {'tag': 'z'}},
+        {'id': 3, 'name': 'c', 'tags': None},
+    ]
+
+
+def test_load_xlsx_streaming():
+    import datetime
+    import openpyxl
+    from tabulator.parsers.xlsx import XLSXParser
+    from dataflows import Flow, load
+
+    os.makedirs('out', exist_ok=True)
+    workbook = openpyxl.Workbook()
+    workbook.active.title = 'first'
+    workbook.active.append(['a', 'b'])
+    workbook.active.append([1, 2])
+    sheet = workbook.create_sheet('data')
+    sheet.append(['id', 'name', 'value', 'date', 'flag'])
+    for i in range(5):
+        sheet.append([i, 'name %d' % i, i / 2, datetime.datetime(2020, 1, i + 1), i % 2 == 0])
+    sheet.append([5, None, None, None, None])
+    sheet['C9'] = 7.5
+    workbook.save('out/test_load_xlsx_streaming.xlsx')
+
+    for sheet in ('data', 2, 'first'):
+        results, _, _ = Flow(load('out/test_load_xlsx_streaming.xlsx', sheet=sheet)).results()
+        expected, _, _ = Flow(
+            load('out/test_load_xlsx_streaming.xlsx', sheet=sheet, custom_parsers=dict(xlsx=XLSXParser))
+        ).results()
+        assert results == expected
+    results, _, _ = Flow(load('out/test_load_xlsx_streaming.xlsx', sheet='data')).results()
+    assert results[0][0] == {
+        'id': 0, 'name': 'name 0', 'value': 0, 'date': datetime.datetime(2020, 1, 1), 'flag': True
+    }
+    assert results[0][-1] == {'id': None, 'name': None, 'value': 7.5, 'date': None, 'flag': None}
+
+    # Without the expected openpyxl internals, openpyxl's rows are used
+    from dataflows.processors.parsers import xlsx_parser
+    book_attributes = xlsx_parser.BOOK_ATTRIBUTES
+    try:
+        xlsx_parser.BOOK_ATTRIBUTES = book_attributes + ('_missing_attribute',)
+        fallback, _, _ = Flow(load('out/test_load_xlsx_streaming.xlsx', sheet='data')).results()
+    finally:
+        xlsx_parser.BOOK_ATTRIBUTES = book_attributes
+    assert fallback == results
+
+
 def test_load_geojson():
     from dataflows import Flow, load, printer
     from decimal import Decimal
@@ -1429,6 +1687,34 @@ def test_load_geojson():
     ]
 
 
+def test_load_geojson_sequences():
+    import json
+    import decimal
+    from dataflows import Flow, load
+
+    with open('data/cities_location.geojson') as f:
+        features = json.load(f)['features']
+    os.makedirs('out', exist_ok=True)
+    with open('out/cities_location.geojsonl', 'w') as f:
+        f.write('\n'.join(json.dumps(feature) for feature in features))
+    with open('out/cities_location.geojsons', 'w') as f:
+        f.write(''.join('\x1e' + json.dumps(feature) + '\n' for feature in features))
+
+    expected, _, _ = Flow(load('data/cities_location.geojson')).results()
+    for path in ['out/cities_location.geojsonl', 'out/cities_location.geojsons']:
+        results, _, _ = Flow(load(path)).results()
+        assert results == expected
+
+    # Property values keep their precision, coordinates are floats
+    with open('out/precise.geojson', 'w') as f:
+        f.write('{"type": "FeatureCollection", "features": [{"type": "Feature", "properties": {"value": '
+                '12345678901234567890.5}, "geometry": {"type": "Point", "coordinates": [51.509865, -0.118092]}}]}')
+    results, dp, _ = Flow(load('out/precise.geojson')).results()
+    assert results[0] == [{'value': decimal.Decimal('12345678901234567890.5'),
+                           '__geometry': {'type': 'Point', 'coordinates': [51.509865, -0.118092]}}]
+    assert dp.descriptor['resources'][0]['schema']['fields'][0]['type'] == 'number'
+
+
 def test_save_load_dates():
     from dataflows import Flow, dump_to_path, load, set_type, printer
     import datetime
@@ -1472,6 +1758,368 @@ def test_stream_simple():
     assert results[1] == datas2
 
 
+def test_stream_schema_aware():
+    from dataflows import stream, unstream, update_schema
+    from decimal import Decimal
+
+    tz = datetime.timezone(datetime.timedelta(hours=2), 'XYZ')
+    datas = [
+        {'a': Decimal('1.5'), 'b': datetime.date(1, 2, 3), 'c': datetime.datetime(2000, 1, 2, 3, 4, 5),
+         'd': datetime.time(1, 2, 3), 'e': {'x': Decimal('2'), 'y': [datetime.date(2000, 1, 1)]}, 'f': 1},
+        {'a': 1.5, 'b': None, 'c': datetime.datetime(2000, 1, 2, 3, 4, 5, tzinfo=tz),
+         'd': None, 'e': {}, 'f': Decimal('3')},
+        {'a': 'not-a-number', 'b': '2000-01-01', 'c': None, 'd': None, 'e': None, 'f': None},
+        {'a': Decimal('1'), 'b': None, 'c': None, 'd': None, 'e': None, 'f': None, 'extra': True},
+    ]
+    schema = dict(fields=[
+        dict(name='a', type='number'), dict(name='b', type='date'), dict(name='c', type='datetime'),
+        dict(name='d', type='time'), dict(name='e', type='object'), dict(name='f', type='integer'),
+    ])
+    for schema_aware in (True, False):
+        Flow(
+            [dict(row) for row in datas],
+            update_schema(-1, **schema),
+            lambda row: row.update(extra=True) if row['a'] == 1 else None,
+            stream('out/test_stream_schema_aware.stream', schema_aware=schema_aware)
+        ).process()
+
+        results, _, _ = Flow(
+            unstream('out/test_stream_schema_aware.stream')
+        ).results(on_error=None)
+        assert results[0] == datas
+        assert results[0][1]['c'].tzname() == 'XYZ'
+
+
+def test_stream_buffered():
+    from dataflows import stream, unstream
+
+    datas1 = [{'a': i} for i in range(2500)]
+    datas2 = [{'b': str(i)} for i in range(10)]
+    for options in (dict(flush_rows=100), dict(flush_rows=None, flush_bytes=1000), dict(flush_seconds=1)):
+        Flow(
+            datas1,
+            datas2,
+            stream('out/test_stream_buffered.stream', **options)
+        ).process()
+
+        results, _, _ = Flow(
+            unstream('out/test_stream_buffered.stream')
+        ).results()
+
+        assert results == [datas1, datas2]
+
+
+def test_stream_wide_integers():
+    from dataflows import stream, unstream
+
+    datas = [dict(x=2**64 + 1), dict(x=-2**63 - 1), dict(x=2**64 - 1), dict(x=12)]
+    for schema_aware in (True, False):
+        Flow(
+            [dict(row) for row in datas],
+            stream('out/test_stream_wide_integers.stream', schema_aware=schema_aware)
+        ).process()
+
+        results, _, _ = Flow(
+            unstream('out/test_stream_wide_integers.stream')
+        ).results()
+
+        assert results[0] == datas
+        assert all(type(row['x']) is int for row in results[0])
+
+
+def test_stream_partially_consumed():
+    import itertools
+    from dataflows import stream, unstream
+
+    datas1 = [{'a': i} for i in range(20)]
+    datas2 = [{'b': str(i)} for i in range(10)]
+
+    def first_rows(rows):
+        if rows.res.name == 'res_1':
+            yield from itertools.islice(rows, 5)
+        else:
+            yield from rows
+
+    for format in ('ndjson', 'binary'):
+        Flow(
+            datas1,
+            datas2,
+            stream('out/test_stream_partially_consumed.stream', format=format, batch_size=3),
+            first_rows,
+        ).process()
+
+        results, _, _ = Flow(
+            unstream('out/test_stream_partially_consumed.stream')
+        ).results()
+
+        assert results == [datas1[:5], datas2]
+
+
+def test_stream_binary():
+    from dataflows import stream, unstream, set_type
+    from decimal import Decimal
+
+    datas1 = [
+        {'a': 1, 'b': True, 'c': 'c1', 'd': datetime.date(2000, 1, 1)},
+        {'a': 2, 'b': False, 'c': 'c2', 'd': None},
+    ]
+    datas2 = [
+        {'e': '1.5'},
+        {'e': '2'},
+    ] * 1000
+    Flow(
+        datas1,
+        datas2,
+        set_type('e', type='number'),
+        stream('out/test_stream_binary.bin', format='binary', compression='zlib', batch_size=100)
+    ).process()
+
+    results, dp, _ = Flow(
+        unstream('out/test_stream_binary.bin')
+    ).results()
+    assert results[0] == datas1
+    assert results[1] == [{'e': Decimal('1.5')}, {'e': Decimal('2')}] * 1000
+
+    results, dp, _ = Flow(
+        unstream('out/test_stream_binary.bin', resources=['res_2'])
+    ).results()
+    assert len(results) == 1
+    assert [r.name for r in dp.resources] == ['res_2']
+    assert len(results[0]) == 2000
+
+
+def test_checkpoint_binary():
+    from dataflows import checkpoint
+    import shutil
+    import os
+
+    shutil.rmtree('.checkpoints/test_checkpoint_binary', ignore_errors=True)
+    for _ in range(2):
+        assert Flow(
+            [{'foo': 'bar'}],
+            checkpoint('test_checkpoint_binary', format='binary')
+        ).results()[0] == [[{'foo': 'bar'}]]
+    assert os.path.exists('.checkpoints/test_checkpoint_binary/resources/res_1.bin')
+
+
+def test_checkpoint_invalidation():
+    from dataflows import checkpoint, load, add_field
+    import shutil
+    import json
+    import os
+
+    shutil.rmtree('.checkpoints/test_checkpoint_invalidation', ignore_errors=True)
+    os.makedirs('out', exist_ok=True)
+    with open('out/test_checkpoint_invalidation.csv', 'w') as f:
+        f.write('a\n1\n2\n')
+
+    def run(value):
+        results = Flow(
+            load('out/test_checkpoint_invalidation.csv'),
+            add_field('b', 'integer', value),
+            checkpoint('test_checkpoint_invalidation')
+        ).results()[0][0]
+        with open('.checkpoints/test_checkpoint_invalidation/checkpoint.json') as f:
+            return results, json.load(f)['created']
+
+    results, created = run(1)
+    assert results == [{'a': 1, 'b': 1}, {'a': 2, 'b': 1}]
+    assert run(1) == (results, created)
+
+    # Changed parameters
+    results, created = run(2)
+    assert results == [{'a': 1, 'b': 2}, {'a': 2, 'b': 2}]
+    assert run(2) == (results, created)
+
+    # Changed source file
+    with open('out/test_checkpoint_invalidation.csv', 'a') as f:
+        f.write('3\n')
+    results, _ = run(2)
+    assert results == [{'a': 1, 'b': 2}, {'a': 2, 'b': 2}, {'a': 3, 'b': 2}]
+
+    # Restoring without any steps uses the checkpoint as is
+    assert Flow(
+        checkpoint('test_checkpoint_invalidation')
+    ).results()[0][0] == results
+
+
+def test_checkpoint_after_join():
+    from dataflows import checkpoint, join
+    import shutil
+    import json
+
+    shutil.rmtree('.checkpoints/test_checkpoint_after_join', ignore_errors=True)
+
+    def run():
+        results = Flow(
+            [dict(k=1, v='a'), dict(k=2, v='b')],
+            [dict(k=1), dict(k=2)],
+            join('res_1', ['k'], 'res_2', ['k'], dict(v=None)),
+            checkpoint('test_checkpoint_after_join')
+        ).results()[0]
+        with open('.checkpoints/test_checkpoint_after_join/checkpoint.json') as f:
+            return results, json.load(f)['created']
+
+    results, created = run()
+    assert results == [[dict(k=1, v='a'), dict(k=2, v='b')]]
+    # The temporary files the join creates don't change the fingerprint
+    assert run() == (results, created)
+
+
+def test_checkpoint_eviction():
+    from dataflows import checkpoint
+    import shutil
+    import os
+
+    path = 'out/test_checkpoint_eviction'
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(os.path.join(path, 'not-a-checkpoint'))
+    for name in ('first', 'second'):
+        Flow(
+            [{'foo': name}],
+            checkpoint(name, checkpoint_path=path, max_size=1)
+        ).process()
+    assert sorted(os.listdir(path)) == ['not-a-checkpoint', 'second']
+
+    Flow(
+        [{'foo': 'third'}],
+        checkpoint('third', checkpoint_path=path, max_age=3600)
+    ).process()
+    assert sorted(os.listdir(path)) == ['not-a-checkpoint', 'second', 'third']
+
+
+def test_checkpoint_resume():
+    from collections import defaultdict
+    from dataflows import checkpoint
+    from dataflows.base.exceptions import ProcessorError
+    import shutil
+
+    shutil.rmtree('.checkpoints/test_checkpoint_resume', ignore_errors=True)
+    counts = defaultdict(int)
+
+    def counter(fail):
+        def count(rows, name):
+            for row in rows:
+                counts[name] += 1
+                assert not (fail and name == 'res_3')
+                yield row
+
+        def func(package):
+            yield package.pkg
+            for res in package:
+                yield count(res, res.res.name)
+        return func
+
+    def run(fail=False, resources=None):
+        counts.clear()
+        return Flow(
+            [dict(a=i) for i in range(3)],
+            [dict(b=i) for i in range(3)],
+            [dict(c=i) for i in range(3)],
+            counter(fail),
+            checkpoint('test_checkpoint_resume', fingerprint='v1', resources=resources),
+        ).results()[0]
+
+    with pytest.raises(ProcessorError):
+        run(fail=True)
+    assert dict(counts) == {'res_1': 3, 'res_2': 3, 'res_3': 1}
+
+    # Saved resources are read from the checkpoint. The previous steps still iterate their rows,
+    # as they might produce the missing resource from them
+    expected = [[dict(a=i) for i in range(3)], [dict(b=i) for i in range(3)], [dict(c=i) for i in range(3)]]
+    assert run() == expected
+    assert dict(counts) == {'res_1': 3, 'res_2': 3, 'res_3': 3}
+    assert run() == expected
+    assert dict(counts) == {}
+
+    # Resources which are not checkpointed are always processed, the others are restored.
+    # Saved resources after the last processed one are not iterated by the previous steps
+    shutil.rmtree('.checkpoints/test_checkpoint_resume', ignore_errors=True)
+    assert run(resources=['res_1', 'res_3']) == expected
+    assert run(resources=['res_1', 'res_3']) == expected
+    assert dict(counts) == {'res_1': 3, 'res_2': 3}
+    shutil.rmtree('.checkpoints/test_checkpoint_resume', ignore_errors=True)
+    assert run(resources=['res_2', 'res_3']) == expected
+    assert run(resources=['res_2', 'res_3']) == expected
+    assert dict(counts) == {'res_1': 3}
+
+    assert Flow(
+        checkpoint('test_checkpoint_resume')
+    ).results()[0] == [expected[1], expected[2]]
+
+
+def test_checkpoint_resume_stateful_steps():
+    from dataflows import checkpoint, duplicate
+    from dataflows.base.exceptions import ProcessorError
+    import shutil
+
+    shutil.rmtree('.checkpoints/test_checkpoint_resume_stateful_steps', ignore_errors=True)
+
+    def crash(fail):
+        def func(package):
+            yield package.pkg
+            for i, res in enumerate(package):
+                assert not (fail and i == 1)
+                yield res
+        return func
+
+    def run(fail=False):
+        return Flow(
+            [dict(a=i) for i in range(3)],
+            duplicate(),
+            crash(fail),
+            checkpoint('test_checkpoint_resume_stateful_steps', fingerprint='v1'),
+        ).results()[0]
+
+    with pytest.raises(ProcessorError):
+        run(fail=True)
+
+    # The duplicated resource is produced from the rows of the saved one
+    expected = [dict(a=i) for i in range(3)]
+    assert run() == [expected, expected]
+
+
+def test_cacheable():
+    from collections import defaultdict
+    from dataflows import cacheable, add_field
+    import shutil
+    import os
+
+    path = 'out/test_cacheable'
+    shutil.rmtree(path, ignore_errors=True)
+    stats = defaultdict(int)
+
+    def data():
+        for i in range(3):
+            stats['loaded'] += 1
+            yield dict(a=i)
+
+    def run(value, factor, **kwargs):
+        def multiply(row):
+            row['b'] *= factor
+
+        return Flow(
+            data(),
+            cacheable(add_field('b', 'integer', value), cache_path=path, **kwargs),
+            multiply,
+        ).results()[0][0]
+
+    assert run(1, 2) == [dict(a=i, b=2) for i in range(3)]
+    assert stats['loaded'] == 3
+
+    # Only a later step changed
+    assert run(1, 3) == [dict(a=i, b=3) for i in range(3)]
+    assert stats['loaded'] == 3
+
+    # A cached step changed
+    assert run(2, 3) == [dict(a=i, b=6) for i in range(3)]
+    assert stats['loaded'] == 6
+    assert len(os.listdir(path)) == 2
+
+    run(3, 3, max_size=1)
+    assert len(os.listdir(path)) == 1
+
+
 def test_stream_bad_dates():
     from dataflows import stream, unstream, set_type, dump_to_path
     import datetime
@@ -1728,6 +2376,517 @@ def test_load_limit_rows():
     ]]
 
 
+def test_load_multiple_files():
+    from dataflows import load
+    import decimal
+    import gzip
+    import shutil
+    import os
+
+    path = 'out/test_load_multiple_files'
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    for i in range(5):
+        with gzip.open(os.path.join(path, 'shard-{}.csv.gz'.format(i)), 'wt') as f:
+            f.write('id,value\n')
+            for j in range(3):
+                f.write('{},{}.5\n'.format(i * 3 + j, j))
+    expected = [dict(id=i, value=decimal.Decimal(i % 3) + decimal.Decimal('0.5')) for i in range(15)]
+
+    for use_processes in (False, True):
+        data, dp, _ = Flow(
+            load(path + '/shard-*.csv.gz', name='shards', workers=2, use_processes=use_processes,
+                 cast_strategy=load.CAST_WITH_SCHEMA)
+        ).results()
+        assert data == [expected]
+        assert dp.descriptor['resources'][0]['name'] == 'shards'
+        assert [f['type'] for f in dp.descriptor['resources'][0]['schema']['fields']] == ['integer', 'number']
+
+    data, dp, _ = Flow(
+        load([path + '/shard-4.csv.gz', path + '/shard-[01].csv.gz'], concatenate_files=False,
+             cast_strategy=load.CAST_WITH_SCHEMA)
+    ).results()
+    assert data == [expected[12:], expected[:3], expected[3:6]]
+    assert [r['name'] for r in dp.descriptor['resources']] == ['shard-4.csv', 'shard-0.csv', 'shard-1.csv']
+
+    # Existing files are loaded as is, even if their names look like glob patterns
+    with open(os.path.join(path, 'data[2020].csv'), 'w') as f:
+        f.write('id\n1\n2\n')
+    data, dp, _ = Flow(load(path + '/data[2020].csv')).results()
+    assert data == [[dict(id=1), dict(id=2)]]
+    assert dp.descriptor['resources'][0]['name'] == 'data[2020]'
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason='requires /proc')
+def test_load_deferred_open():
+    from dataflows import load
+    import gc
+
+    def open_files():
+        return len(os.listdir('/proc/self/fd'))
+
+    gc.collect()
+    before = open_files()
+
+    def check(package):
+        # All descriptors are ready, but no source was opened yet
+        assert open_files() <= before
+        yield package.pkg
+        for res in package:
+            yield res
+
+    data, dp, _ = Flow(
+        *[load('data/beatles.csv', name='beatles_{}'.format(i)) for i in range(10)],
+        load('data/beatles.csv', name='known_schema', override_schema=dict(fields=[
+            dict(name='name', type='string'), dict(name='instrument', type='string'),
+        ])),
+        check
+    ).results()
+    assert len(data) == 11
+    assert all(len(rows) == 4 for rows in data)
+    assert open_files() <= before
+
+
+def test_load_reuses_inference_stream():
+    import importlib
+    from dataflows import load, dump_to_sql, update_resource, select_fields
+
+    load_module = importlib.import_module('dataflows.processors.load')
+    os.makedirs('out', exist_ok=True)
+    Flow(
+        [dict(id=i, name='name {}'.format(i)) for i in range(5)],
+        update_resource(-1, name='items'),
+        dump_to_sql(dict(reuse_items={'resource-name': 'items'}), engine='sqlite:///out/reuse.db')
+    ).process()
+
+    open_stream = load_module.open_stream
+    sources = []
+
+    def counting_open_stream(source, *args, **kwargs):
+        sources.append(source)
+        return open_stream(source, *args, **kwargs)
+
+    try:
+        load_module.open_stream = counting_open_stream
+        # Local files are opened again for their rows
+        results = Flow(load('data/beatles.csv')).results()[0]
+        assert len(results[0]) == 4
+        assert len(sources) == 2
+        # Other sources are read once, unless the pushed down steps change the query
+        sources.clear()
+        results = Flow(load('sqlite:///out/reuse.db', table='reuse_items', name='items')).results()[0]
+        assert results[0] == [dict(id=i, name='name {}'.format(i)) for i in range(5)]
+        assert len(sources) == 1
+        sources.clear()
+        results = Flow(load('sqlite:///out/reuse.db', table='reuse_items', name='items'),
+                       select_fields(['id'])).results()[0]
+        assert results[0] == [dict(id=i) for i in range(5)]
+        assert len(sources) == 2
+    finally:
+        load_module.open_stream = open_stream
+
+
+def test_load_schema_cache():
+    from dataflows import load
+    import shutil
+    import json
+
+    path = 'out/test_load_schema_cache'
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    shutil.copy('data/beatles.csv', path + '/beatles.csv')
+
+    def run():
+        return Flow(
+            load(path + '/beatles.csv', schema_cache=path + '/schemas', override_fields=dict(name=dict(title='Name')))
+        ).results()[1].descriptor['resources'][0]['schema']
+
+    schema = run()
+    assert [(f['name'], f['type'], f.get('title')) for f in schema['fields']] == [
+        ('name', 'string', 'Name'), ('instrument', 'string', None)
+    ]
+    cached = [f for f in os.listdir(path + '/schemas')]
+    assert len(cached) == 1
+
+    # The cached schema is used instead of inferring it again
+    with open(os.path.join(path, 'schemas', cached[0])) as f:
+        entry = json.load(f)
+    entry['schema']['fields'][1]['description'] = 'from cache'
+    with open(os.path.join(path, 'schemas', cached[0]), 'w') as f:
+        json.dump(entry, f)
+    assert run()['fields'][1]['description'] == 'from cache'
+
+    # A modified file is inferred again
+    with open(path + '/beatles.csv', 'a') as f:
+        f.write('yoko,vocals\n')
+    assert 'description' not in run()['fields'][1]
+    assert len(os.listdir(path + '/schemas')) == 2
+
+
+def test_load_csv_fast_path():
+    from dataflows import load
+    from dataflows.helpers.csv_stream import CSVStream
+    from tabulator.parsers.csv import CSVParser
+    import shutil
+    import gzip
+    import bz2
+
+    path = 'out/test_load_csv_fast_path'
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    with open('data/empty_headers.csv', 'rb') as source:
+        content = source.read()
+    with gzip.open(path + '/empty_headers.csv.gz', 'wb') as f:
+        f.write(content)
+    with bz2.open(path + '/empty_headers.csv.bz2', 'wb') as f:
+        f.write(content)
+
+    sources = [
+        ('data/beatles.csv', {}),
+        ('data/empty_headers.csv', {}),
+        ('data/duplicate_headers.csv', dict(deduplicate_headers=True)),
+        ('data/missing_values.csv', dict(extract_missing_values=True, override_schema={'missingValues': ['', '-']})),
+        ('data/cities_comment.csv', dict(limit_rows=2, strip=False)),
+        ('data/temporal.csv', dict(delimiter=',', encoding='utf-8')),
+    ]
+    for source, options in sources:
+        loader = load(source, **options)
+        loader.set_default_options()
+        assert CSVStream.supports(source, loader.options)
+        fast = Flow(load(source, **options)).results()
+        # tabulator is used when a custom csv parser is given
+        slow = Flow(load(source, custom_parsers=dict(csv=CSVParser), **options)).results()
+        assert fast[0] == slow[0]
+        assert fast[1].descriptor == slow[1].descriptor
+
+    expected = Flow(load('data/empty_headers.csv', name='data')).results()
+    for compression in ['gz', 'bz2']:
+        results = Flow(load(path + '/empty_headers.csv.' + compression, name='data')).results()
+        assert results[0] == expected[0]
+        assert results[1].descriptor['resources'][0]['format'] == 'csv'
+        assert results[1].descriptor['resources'][0]['schema'] == expected[1].descriptor['resources'][0]['schema']
+
+
+def test_load_csv_chunks():
+    from dataflows import load
+    from dataflows.helpers.csv_stream import CSVStream
+    import shutil
+    import csv
+
+    path = 'out/test_load_csv_chunks'
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    values = ['plain', 'with "quotes"', 'multi\nline\nvalue', 'comma, here', 'crlf\r\nvalue', '']
+    with open(path + '/data.csv', 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'text', '', 'value'])
+        for i in range(500):
+            writer.writerow([i, values[i % len(values)], '', i * 2])
+
+    expected = Flow(load(path + '/data.csv')).results()
+    chunk_size = CSVStream.CHUNK_SIZE
+    try:
+        CSVStream.CHUNK_SIZE = 256
+        stream = CSVStream(path + '/data.csv', workers=2, ignore_blank_headers=True,
+                           skip_rows=[{'type': 'preset', 'value': 'auto'}]).open()
+        assert stream.can_split()
+        assert len(list(stream.chunks())) > 10
+        stream.close()
+        results = Flow(load(path + '/data.csv', workers=2)).results()
+    finally:
+        CSVStream.CHUNK_SIZE = chunk_size
+    assert results[0] == expected[0]
+    assert len(results[0][0]) == 500
+    assert results[0][0][2] == dict(id=2, text='multi\nline\nvalue', value=4)
+    assert results[1].descriptor == expected[1].descriptor
+
+
+def test_load_csv_chunks_unquoted_quotes():
+    from dataflows import load
+    from dataflows.helpers.csv_stream import CSVStream
+    import shutil
+
+    path = 'out/test_load_csv_chunks_unquoted_quotes'
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    with open(path + '/data.csv', 'w', newline='') as f:
+        f.write('id,text,value\n')
+        for i in range(200):
+            # A quote inside an unquoted value makes the count of quotes odd
+            text = '5" tv' if i % 7 == 0 else '"multi\nline, value"' if i % 3 == 0 else 'plain'
+            f.write('{},{},{}\n'.format(i, text, i * 2))
+
+    expected = Flow(load(path + '/data.csv')).results()
+    chunk_size = CSVStream.CHUNK_SIZE
+    try:
+        CSVStream.CHUNK_SIZE = 64
+        results = Flow(load(path + '/data.csv', workers=2)).results()
+    finally:
+        CSVStream.CHUNK_SIZE = chunk_size
+    assert results[0] == expected[0]
+    assert len(results[0][0]) == 200
+    assert results[0][0][3] == dict(id=3, text='multi\nline, value', value=6)
+    assert results[0][0][7] == dict(id=7, text='5" tv', value=14)
+
+
+def test_load_ndjson():
+    import json
+    import shutil
+    import datetime
+    import decimal
+    from dataflows import load, dump_to_path
+    from dataflows.helpers.extended_json import ejson
+    from dataflows.helpers.ndjson_stream import NDJSONStream
+    from tabulator.parsers.ndjson import NDJSONParser
+
+    path = 'out/test_load_ndjson'
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    with open(path + '/data.ndjson', 'w') as f:
+        for i in range(200):
+            f.write(json.dumps(dict(
+                id=i, name='name {}'.format(i), value=i / 4, date='2020-01-{:02d}'.format(i % 28 + 1),
+                time='10:00:{:02d}'.format(i % 60), flag=i % 3 == 0, tags=dict(a=i)
+            )) + '\n')
+
+    for cast_strategy in [load.CAST_DO_NOTHING, load.CAST_WITH_SCHEMA]:
+        loader = load(path + '/data.ndjson', cast_strategy=cast_strategy)
+        loader.set_default_options()
+        assert NDJSONStream.supports(path + '/data.ndjson', loader.options)
+        fast = Flow(load(path + '/data.ndjson', cast_strategy=cast_strategy)).results()
+        # tabulator is used when a custom ndjson parser is given
+        slow = Flow(load(path + '/data.ndjson', cast_strategy=cast_strategy,
+                         custom_parsers=dict(ndjson=NDJSONParser))).results()
+        assert fast[0] == slow[0]
+        assert fast[1].descriptor == slow[1].descriptor
+    assert fast[0][0][1] == dict(
+        id=1, name='name 1', value=decimal.Decimal('0.25'), date=datetime.date(2020, 1, 2),
+        time=datetime.time(10, 0, 1), flag=False, tags=dict(a=1)
+    )
+
+    # Chunks are decoded in parallel
+    chunk_size = NDJSONStream.CHUNK_SIZE
+    try:
+        NDJSONStream.CHUNK_SIZE = 256
+        stream = NDJSONStream(path + '/data.ndjson', workers=2).open()
+        assert stream.can_split()
+        assert list(stream.iter()) == list(NDJSONStream(path + '/data.ndjson').open().iter())
+    finally:
+        NDJSONStream.CHUNK_SIZE = chunk_size
+
+    # Typed values written by `stream` are restored
+    rows = [
+        dict(amount=decimal.Decimal('1.10'), day=datetime.date(2020, 1, 1), at=datetime.datetime(2020, 1, 1, 10, 30)),
+        dict(amount=decimal.Decimal('-3'), day=datetime.date(1999, 12, 31),
+             at=datetime.datetime(1999, 12, 31, 23, 59, 59)),
+    ]
+    with open(path + '/typed.jsonl', 'w') as f:
+        f.write('\n'.join(ejson.dumps(row) for row in rows))
+    results, dp, _ = Flow(load(path + '/typed.jsonl', cast_strategy=load.CAST_WITH_SCHEMA)).results()
+    assert results[0] == rows
+    assert [f['type'] for f in dp.descriptor['resources'][0]['schema']['fields']] == ['number', 'datetime', 'date']
+
+    # Objects are projected onto the headers, which are the keys of the first object
+    with open(path + '/uneven.ndjson', 'w') as f:
+        f.write('{"a": "x", "b": 1}\n{"a": "y", "c": 5}\n{"b": 2}\n')
+    fast = Flow(load(path + '/uneven.ndjson'), dump_to_path(path + '/uneven')).results()
+    slow = Flow(load(path + '/uneven.ndjson', custom_parsers=dict(ndjson=NDJSONParser))).results()
+    assert fast[0] == slow[0] == [[dict(a='x', b=1), dict(a='y', b=None), dict(a=None, b=2)]]
+
+
+def test_dump_load_parquet():
+    pytest.importorskip('pyarrow')
+    import datetime
+    import decimal
+    import pyarrow.parquet as pq
+    from dataflows import load, dump_to_path, filter_rows, select_fields, update_resource
+    from dataflows.helpers.parquet_stream import ParquetStream
+
+    rows = [
+        dict(id=i, name='name {}'.format(i % 7), value=decimal.Decimal(i) / 4, day=datetime.date(2020, 1, i % 28 + 1),
+             flag=i % 3 == 0, tags=dict(a=i), note=None if i % 2 else 'note')
+        for i in range(100)
+    ]
+    Flow(rows, update_resource(-1, name='data', path='data.csv'),
+         dump_to_path('out/test_parquet', format='parquet', options=dict(row_group_size=10))).process()
+    parquet = pq.ParquetFile('out/test_parquet/data.parquet')
+    assert parquet.metadata.num_row_groups == 10
+    assert [str(f.type) for f in parquet.schema_arrow] == ['int64', 'string', 'decimal128(38, 2)', 'date32[day]',
+                                                           'bool', 'string', 'string']
+
+    # Numbers are written as decimals, or as strings if they don't fit, keeping their precision,
+    # unless written as doubles
+    precise = [dict(value=decimal.Decimal('0.1000000000000000055511151231257827')),
+               dict(value=decimal.Decimal('-12345678901234567890.5'))]
+    for count, arrow_type in [(1, 'decimal128(38, 34)'), (2, 'string')]:
+        Flow(precise[:count], update_resource(-1, name='precise', path='precise.csv'),
+             dump_to_path('out/test_parquet_precise', format='parquet')).process()
+        assert str(pq.ParquetFile('out/test_parquet_precise/precise.parquet').schema_arrow[0].type) == arrow_type
+        results, dp, _ = Flow(load('out/test_parquet_precise/precise.parquet')).results()
+        assert results[0] == precise[:count]
+        assert dp.descriptor['resources'][0]['schema']['fields'][0]['type'] == 'number'
+    Flow(precise, update_resource(-1, name='precise', path='precise.csv'),
+         dump_to_path('out/test_parquet_float', format='parquet', options=dict(float_numbers=True))).process()
+    assert str(pq.ParquetFile('out/test_parquet_float/precise.parquet').schema_arrow[0].type) == 'double'
+    results, _, _ = Flow(load('out/test_parquet_float/datapackage.json')).results()
+    assert results[0] == [dict(value=decimal.Decimal('0.1')), dict(value=decimal.Decimal('-12345678901234567000'))]
+
+    # Dumped packages are loaded with their schema
+    results, dp, _ = Flow(load('out/test_parquet/datapackage.json')).results()
+    assert results[0] == rows
+    assert dp.descriptor['resources'][0]['format'] == 'parquet'
+
+    # Files are loaded with an inferred schema
+    results, dp, _ = Flow(load('out/test_parquet/data.parquet', cast_strategy=load.CAST_WITH_SCHEMA)).results()
+    assert results[0] == rows
+    assert [f['type'] for f in dp.descriptor['resources'][0]['schema']['fields']] == \
+        ['integer', 'string', 'number', 'date', 'boolean', 'object', 'any']
+
+    # Only used columns are read, and row groups which can't match are skipped
+    loader = load('out/test_parquet/data.parquet')
+    results = Flow(loader, filter_rows(equals=[dict(id=15), dict(id=42)]), select_fields(['id', 'name'])).results()
+    assert results[0][0] == [dict(id=15, name='name 1'), dict(id=42, name='name 0')]
+    stream = ParquetStream('out/test_parquet/data.parquet').open()
+    stream.select(loader.projections['data'])
+    stream.filter(loader.pushed_down_filters('data'))
+    assert stream.headers == ['id', 'name']
+    assert stream.row_groups() == [1, 4]
+    stream.filter([dict(equals=[], not_equals=[dict(flag=False)]), dict(equals=[dict(note=None)], not_equals=[])])
+    assert stream.row_groups() == list(range(10))
+    stream.filter([dict(equals=[dict(id=100)], not_equals=[])])
+    assert list(stream.iter()) == []
+
+
+def test_arrow_interchange():
+    pa = pytest.importorskip('pyarrow')
+    import decimal
+    from dataflows import add_field, filter_rows
+
+    table = pa.table(dict(
+        id=[1, 2, 3],
+        value=[1.5, None, 2.25],
+        name=['a', 'b', 'c'],
+        day=[datetime.date(2020, 1, i) for i in range(1, 4)],
+        tags=[[1], [], [2, 3]],
+    ))
+    expected = [
+        dict(id=1, value=decimal.Decimal('1.5'), name='a', day=datetime.date(2020, 1, 1), tags=[1]),
+        dict(id=2, value=None, name='b', day=datetime.date(2020, 1, 2), tags=[]),
+        dict(id=3, value=decimal.Decimal('2.25'), name='c', day=datetime.date(2020, 1, 3), tags=[2, 3]),
+    ]
+    # Tables, record batches and streams of record batches are loaded like lists of rows
+    for data in [table, table.to_batches()[0], pa.RecordBatchReader.from_batches(table.schema, table.to_batches())]:
+        results, dp, _ = Flow(data).results()
+        assert results[0] == expected
+        assert [f['type'] for f in dp.descriptor['resources'][0]['schema']['fields']] == \
+            ['integer', 'number', 'string', 'date', 'array']
+
+    tables, dp, _ = Flow(
+        table,
+        add_field('flag', 'boolean', True),
+        filter_rows(not_equals=[dict(id=2)]),
+    ).arrow_results(batch_size=1)
+    assert [str(f.type) for f in tables[0].schema] == \
+        ['int64', 'decimal128(3, 2)', 'string', 'date32[day]', 'string', 'bool']
+    assert [batch.num_rows for batch in tables[0].to_batches()] == [1, 1]
+    assert tables[0].to_pylist() == [
+        dict(id=1, value=decimal.Decimal('1.50'), name='a', day=datetime.date(2020, 1, 1), tags='[1]', flag=True),
+        dict(id=3, value=decimal.Decimal('2.25'), name='c', day=datetime.date(2020, 1, 3), tags='[2, 3]', flag=True),
+    ]
+
+    # Numbers are kept as decimals, or as strings if they don't fit, unless converted to doubles
+    precise = [dict(value=decimal.Decimal('0.1000000000000000055511151231257827')),
+               dict(value=decimal.Decimal('-12345678901234567890.5'))]
+    for count, arrow_type in [(1, 'decimal128(34, 34)'), (2, 'string')]:
+        tables, _, _ = Flow(precise[:count]).arrow_results()
+        assert str(tables[0].schema[0].type) == arrow_type
+        results, dp, _ = Flow(tables[0]).results()
+        assert results[0] == precise[:count]
+        assert dp.descriptor['resources'][0]['schema']['fields'][0]['type'] == 'number'
+    tables, _, _ = Flow(precise[:1]).arrow_results(float_numbers=True)
+    assert tables[0].to_pylist() == [dict(value=0.1)]
+
+
+def test_load_pushdown():
+    from dataflows import load, select_fields, delete_fields, filter_rows, dump_to_sql, update_resource
+
+    def steps():
+        return [
+            delete_fields(['Name']),
+            filter_rows(equals=[{'Year': '1928'}, {'Winner': '1'}], not_equals=[{'Award': 'Actor'}]),
+            select_fields(['Year', 'Award']),
+        ]
+
+    for cast_strategy in [load.CAST_DO_NOTHING, load.CAST_WITH_SCHEMA]:
+        loader = load('data/academy.csv', cast_strategy=cast_strategy)
+        results = Flow(loader, *steps()).results()
+        assert loader.projections == dict(academy=['Year', 'Award', 'Winner'])
+        assert list(loader.predicates) == ['academy']
+        # A step in between prevents pushing down
+        expected = Flow(load('data/academy.csv', cast_strategy=cast_strategy), lambda row: None, *steps()).results()
+        assert results[0] == expected[0]
+        assert results[1].descriptor == expected[1].descriptor
+
+    # Filtering in load would change which rows are limited
+    loader = load('data/academy.csv', limit_rows=10)
+    results = Flow(loader, filter_rows(equals=[{'Winner': '1'}])).results()
+    assert loader.predicates == {}
+    expected = Flow(load('data/academy.csv'), lambda row: None, filter_rows(equals=[{'Winner': '1'}])).results()
+    assert 0 < len(results[0][0]) < len(expected[0][0])
+    assert results[0][0] == expected[0][0][:len(results[0][0])]
+
+    Flow(
+        [dict(id=i, name='name {}'.format(i), score=i % 4) for i in range(20)],
+        update_resource(-1, name='scores'),
+        dump_to_sql(dict(pushdown_scores={'resource-name': 'scores'}), engine='sqlite:///out/pushdown.db')
+    ).process()
+    loader = load('sqlite:///out/pushdown.db', table='pushdown_scores', name='scores', strip=False)
+    results = Flow(
+        loader,
+        filter_rows(equals=[{'score': 1}]),
+        select_fields(['id']),
+    ).results()
+    assert results[0][0] == [dict(id=1), dict(id=5), dict(id=9), dict(id=13), dict(id=17)]
+    assert loader.sql_pushdown_options('scores') == dict(
+        fields=['id', 'score'], filters=[dict(equals=[{'score': 1}], not_equals=[])]
+    )
+
+
+def test_load_sql_partitions():
+    from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String
+    from dataflows import load, filter_rows
+    from dataflows.processors.parsers.sql_parser import ENGINES
+
+    os.makedirs('out', exist_ok=True)
+    if os.path.exists('out/partitions.db'):
+        os.remove('out/partitions.db')
+    engine = create_engine('sqlite:///out/partitions.db')
+    metadata = MetaData()
+    table = Table('scores', metadata, Column('id', Integer, primary_key=True), Column('score', Integer),
+                  Column('name', String))
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(table.insert(), [dict(id=i, score=i % 4, name='name {}'.format(i)) for i in range(3, 100)])
+    engine.dispose()
+
+    expected = Flow(load('sqlite:///out/partitions.db', table='scores', order_by='id')).results()[0]
+    assert len(expected[0]) == 97
+    for options in [dict(partitions=4), dict(partitions=3, fetch_size=5), dict(partitions=200, partition_by='id')]:
+        results = Flow(load('sqlite:///out/partitions.db', table='scores', **options)).results()[0]
+        assert results == expected
+    assert 'sqlite:///out/partitions.db' in ENGINES
+
+    results = Flow(
+        load('sqlite:///out/partitions.db', table='scores', partitions=4, limit_rows=10),
+    ).results()[0]
+    assert results[0] == expected[0][:10]
+    results = Flow(
+        load('sqlite:///out/partitions.db', table='scores', partitions=4, strip=False),
+        filter_rows(equals=[{'score': 1}]),
+    ).results()[0]
+    assert results[0] == [row for row in expected[0] if row['score'] == 1]
+
+
 def test_set_type_regex():
     from dataflows import load, set_type
     flow = Flow(
@@ -1855,6 +3014,81 @@ def test_join_full_outer():
     ]]
 
 
+def test_join_persistent_index():
+    from dataflows import join
+    import shutil
+
+    shutil.rmtree('.checkpoints/test_join_persistent_index', ignore_errors=True)
+
+    stats = dict(read=0)
+
+    def count(row):
+        stats['read'] += 1
+
+    def run(fingerprint=None):
+        return Flow(
+            [dict(id=i, population=i * 10) for i in range(1, 4)],
+            count,
+            [dict(id=1, city='london'), dict(id=3, city='rome'), dict(id=4, city='paris')],
+            join(
+                source_name='res_1', source_key=['id'],
+                target_name='res_2', target_key=['id'],
+                fields={'population': None},
+                index_path='.checkpoints/test_join_persistent_index',
+                index_fingerprint=fingerprint,
+            ),
+        ).results()[0]
+
+    expected = [[
+        {'id': 1, 'city': 'london', 'population': 10},
+        {'id': 3, 'city': 'rome', 'population': 30},
+        {'id': 4, 'city': 'paris', 'population': None},
+    ]]
+    # Without any content signal, the index is rebuilt every time
+    assert run() == expected
+    read = stats['read']
+    assert run() == expected
+    assert stats['read'] > read
+    assert run(fingerprint='v1') == expected
+    read = stats['read']
+    assert run(fingerprint='v1') == expected
+    assert stats['read'] == read
+    assert run(fingerprint='v2') == expected
+    assert stats['read'] > read
+
+
+def test_join_persistent_index_source_changes():
+    from dataflows import join, load, dump_to_path, update_resource
+    import shutil
+
+    index_path = '.checkpoints/test_join_persistent_index_source_changes'
+    shutil.rmtree(index_path, ignore_errors=True)
+    os.makedirs('out/test_join_index', exist_ok=True)
+
+    def run(source):
+        return Flow(
+            load(source),
+            [dict(id=1, city='london')],
+            join(
+                source_name='src', source_key=['id'],
+                target_name='res_2', target_key=['id'],
+                fields={'pop': None}, index_path=index_path,
+            ),
+        ).results()[0][0][0]['pop']
+
+    # A loaded CSV carries no content information, so the index isn't reused
+    for pop in [10, 99]:
+        with open('out/test_join_index/src.csv', 'w') as f:
+            f.write('id,pop\n1,{}\n'.format(pop))
+        assert run('out/test_join_index/src.csv') == pop
+
+    # A dumped datapackage has the hash of its resources
+    for pop in [10, 10, 99]:
+        Flow([dict(id=1, pop=pop)], update_resource(-1, name='src', path='src.csv'),
+             dump_to_path('out/test_join_index/package')).process()
+        assert run('out/test_join_index/package/datapackage.json') == pop
+
+
 def test_join_row_number():
     from dataflows import load, set_type, join
     flow = Flow(
@@ -2596,6 +3830,53 @@ def test_dump_to_json_objects():
             assert res[50]['c'][x] == data[50][x]
 
 
+def test_dump_to_path_compression():
+    import bz2
+    import gzip
+    import json
+    import hashlib
+    import importlib.util
+    from dataflows import Flow, dump_to_path, load
+
+    data = [dict(a=str(i), b=i) for i in range(100)]
+    Flow(data, dump_to_path(out_path='out/test_compression_none')).process()
+    with open('out/test_compression_none/res_1.csv', 'rb') as f:
+        plain = f.read()
+
+    for compression, extension, decompress in [('gzip', 'gz', gzip.decompress), ('bz2', 'bz2', bz2.decompress)]:
+        for file_format in ['csv', 'json']:
+            out_path = 'out/test_compression_{}_{}'.format(compression, file_format)
+            Flow(data, dump_to_path(out_path=out_path, format=file_format, file_compression=compression)).process()
+            with open(out_path + '/datapackage.json') as f:
+                resource = json.load(f)['resources'][0]
+            assert resource['path'] == 'res_1.{}.{}'.format(file_format, extension)
+            assert resource['compression'] == extension
+            with open(out_path + '/' + resource['path'], 'rb') as f:
+                compressed = f.read()
+            # Size and hash are those of the compressed file
+            assert resource['bytes'] == len(compressed)
+            assert resource['hash'] == hashlib.md5(compressed).hexdigest()
+            if file_format == 'csv':
+                assert decompress(compressed) == plain
+            else:
+                assert json.loads(decompress(compressed)) == data
+
+    results, _, _ = Flow(load('out/test_compression_gzip_csv/datapackage.json')).results()
+    assert results[0] == data
+
+    with pytest.raises(ProcessorError):
+        Flow(data, dump_to_path(out_path='out/test_compression_excel', format='xlsx',
+                                file_compression='gzip')).process()
+
+    # Parquet files are compressed by their writer's `compression` option
+    if importlib.util.find_spec('pyarrow') is not None:
+        import pyarrow.parquet as pq
+        Flow(data, dump_to_path(out_path='out/test_compression_parquet', format='parquet',
+                                options=dict(compression='gzip'))).process()
+        parquet = pq.ParquetFile('out/test_compression_parquet/res_1.parquet')
+        assert parquet.metadata.row_group(0).column(0).compression == 'GZIP'
+
+
 def aux_profile(filename, fast=False):
     from dataflows import Flow, load, schema_validator
     return Flow(